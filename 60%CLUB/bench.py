@@ -0,0 +1,362 @@
+"""
+    Benchmarks of the hub model
+
+    Runs the project's traffic files and synthetic traces of growing
+    size (see tracegen.py) through sim.simulate() for every engine and
+    timing model asked for, and records for every run:
+
+        wall time     of the simulation, loading the trace not included
+        events/s      generator resumptions per second (event engine
+                      only, MyHDL doesn't count them) and transactions
+                      per second
+        peak memory   max resident set size of the process
+        stats         hits, misses, cost, latency and simulation time
+
+    Every run gets its own child process, so the peak memory is that
+    run's, and is repeated --repeat times; the fastest repeat is the
+    one recorded, since the slower ones only measure what else the
+    machine was doing. Per-bit timing is a reference model at about a
+    hundred transactions a second, so it only runs on traces up to
+    --bit-max-rows, and MyHDL only up to --myhdl-max-rows. The
+    synthetic traces are written as binary trace files to a directory
+    once and reused by later runs.
+
+    The results can be saved as a JSON baseline. With --baseline a run
+    is compared to one: a run that is more than --tolerance slower (in
+    transactions per second, for runs of at least a second) is a
+    regression, and stats that are not the same are a mismatch.
+    Either makes the exit status 1.
+
+        python bench.py --sizes 1e3 1e4 1e5 --save baseline.json
+        python bench.py --sizes 1e3 1e4 1e5 --baseline baseline.json
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+# use argparse package, parses command line arguments
+import argparse
+
+# baselines are JSON files
+import json
+
+# a child process per run
+from multiprocessing import Pool
+
+# wall time, peak memory and where the machine info comes from
+import time
+import resource
+import platform
+import sys
+
+# where the traces are
+from os import makedirs
+from os.path import isfile, isdir, join, basename, dirname, abspath
+
+# the hub model and the trace generator
+import sim
+from tracefile import write_binary
+from tracegen import generate
+
+
+# the project's traffic files, next to this file
+SHIPPED = [join(dirname(abspath(__file__)), 'final_project_traffic_%d.csv' % i)
+           for i in (1, 2, 3)]
+
+# synthetic trace sizes, 1e3 to 1e7 transactions
+SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+
+# biggest trace for per-bit timing
+BIT_MAX_ROWS = 10**4
+
+# biggest trace for the MyHDL engine
+MYHDL_MAX_ROWS = 10**6
+
+# runs of every benchmark, the fastest one counts
+REPEATS = 3
+
+# runs shorter than this (seconds) are too noisy to call regressions
+MIN_WALL = 1.0
+
+# stats compared with the baseline
+STATS = ('l1_hits', 'l1_misses', 'l2_hits', 'l2_misses', 'comm_cost',
+         'cum_latency', 'time')
+
+
+def synthetic(rows, directory, seed=0):
+    """
+        Filename of a synthetic trace, made if it isn't there yet
+
+        :param input rows: number of transactions
+        :param input directory: where the traces are kept
+        :param input seed: seed of the trace
+    """
+    fname = join(directory, 'synthetic_%d_%d.trc' % (rows, seed))
+    if not isfile(fname):
+        if not isdir(directory):
+            makedirs(directory)
+
+        # zipf popular tags, defaults for the rest
+        write_binary(generate(rows, popularity='zipf', seed=seed), fname)
+    return fname
+
+
+def run(task):
+    """
+        Benchmark one simulation, in a child process
+
+        Returns a dict with the measurements and the stats
+
+        :param input task: (trace filename, engine, timing, payload)
+    """
+    fname, engine, timing, payload = task
+
+    # load the trace first, that isn't part of the simulation
+    started = time.time()
+    trace = sim.load_trace(fname)
+    load_time = time.time() - started
+
+    started = time.time()
+    result = sim.simulate(trace, sim.hierarchy(engine=engine, timing=timing,
+                                               payload=payload))
+    wall = time.time() - started
+
+    # peak resident set size, KB on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    rows = len(trace)
+    return {
+        'trace': basename(fname),
+        'rows': rows,
+        'engine': engine,
+        'timing': timing,
+        'payload': payload,
+        'load_time': load_time,
+        'wall_time': wall,
+        'events': result.events,
+        'events_per_sec': result.events/wall if result.events and wall else None,
+        'transactions_per_sec': rows/wall if wall else None,
+        'peak_rss_mb': rss/1024.0,
+        'stats': dict((name, getattr(result, name)) for name in STATS),
+    }
+
+
+def fastest(records):
+    """
+        Record of the fastest repeat of a benchmark
+
+        :param input records: run records of the repeats
+    """
+    record = min(records, key=lambda record: record['wall_time'])
+    record['wall_times'] = [r['wall_time'] for r in records]
+    return record
+
+
+def key(record):
+    """ What a run is compared on """
+    return (record['trace'], record['engine'], record['timing'],
+            record['payload'])
+
+
+def compare(results, baseline, tolerance):
+    """
+        Compare runs with a baseline
+
+        Returns a list of (run, problem) for the regressions and
+        mismatches, runs that aren't in the baseline are skipped
+
+        :param input results: list of run records
+        :param input baseline: list of run records of the baseline
+        :param input tolerance: fraction slower that is still fine
+    """
+    old = dict((key(record), record) for record in baseline)
+    problems = []
+    for record in results:
+        before = old.get(key(record))
+        if before is None:
+            continue
+
+        # same trace and hierarchy, the stats have to be the same
+        for name in STATS:
+            a, b = record['stats'][name], before['stats'][name]
+            if not np.isclose(a, b, rtol=1e-9, atol=0):
+                problems.append((record, 'mismatch: %s %s, baseline %s' % (name, a, b)))
+
+        # slower than the baseline by more than the tolerance
+        now, then = record['transactions_per_sec'], before['transactions_per_sec']
+        if before['wall_time'] < MIN_WALL:
+            continue
+        if now and then and now < then*(1 - tolerance):
+            problems.append((record, 'regression: %.0f transactions/s, baseline %.0f (%.0f%% slower)'
+                             % (now, then, 100*(1 - now/then))))
+    return problems
+
+
+def machine():
+    """ What the benchmarks ran on """
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+if __name__ == '__main__':
+
+    # initialize argument parser
+    parser = argparse.ArgumentParser()
+
+    # arguments for the traces
+    parser.add_argument('--sizes',
+                        action='store',
+                        dest='sizes',
+                        nargs='*',
+                        type=float,
+                        default=SIZES,
+                        help='transactions in the synthetic traces'
+                        )
+    parser.add_argument('--no-shipped',
+                        action='store_false',
+                        dest='shipped',
+                        help="leave out the project's traffic files"
+                        )
+    parser.add_argument('--trace-dir',
+                        action='store',
+                        dest='trace_dir',
+                        default='bench_traces',
+                        help='where the synthetic traces are kept'
+                        )
+
+    # arguments for the simulations
+    parser.add_argument('-e', '--engines',
+                        action='store',
+                        dest='engines',
+                        nargs='+',
+                        choices=['event', 'myhdl'],
+                        default=['event', 'myhdl'],
+                        help='simulation engines'
+                        )
+    parser.add_argument('-t', '--timings',
+                        action='store',
+                        dest='timings',
+                        nargs='+',
+                        choices=['phase', 'bit'],
+                        default=['phase', 'bit'],
+                        help='timing models'
+                        )
+    parser.add_argument('--bit-max-rows',
+                        action='store',
+                        dest='bit_max_rows',
+                        type=float,
+                        default=BIT_MAX_ROWS,
+                        help='biggest synthetic trace for per-bit timing'
+                        )
+    parser.add_argument('--myhdl-max-rows',
+                        action='store',
+                        dest='myhdl_max_rows',
+                        type=float,
+                        default=MYHDL_MAX_ROWS,
+                        help='biggest synthetic trace for the MyHDL engine'
+                        )
+    parser.add_argument('-r', '--repeat',
+                        action='store',
+                        dest='repeat',
+                        type=int,
+                        default=REPEATS,
+                        help='runs of every benchmark, the fastest counts'
+                        )
+    parser.add_argument('--no-payload',
+                        action='store_false',
+                        dest='payload',
+                        help='cache lines only keep their tag, size and state'
+                        )
+
+    # arguments for the baselines
+    parser.add_argument('--save',
+                        action='store',
+                        dest='save',
+                        help='write the results to this JSON file'
+                        )
+    parser.add_argument('--baseline',
+                        action='store',
+                        dest='baseline',
+                        help='compare with the results in this JSON file'
+                        )
+    parser.add_argument('--tolerance',
+                        action='store',
+                        dest='tolerance',
+                        type=float,
+                        default=0.1,
+                        help='fraction slower than the baseline that is '
+                             'not a regression'
+                        )
+
+    # parse the arguments
+    arguments = parser.parse_args()
+
+    # every trace with every engine and timing model
+    traces = [(fname, 0) for fname in (SHIPPED if arguments.shipped else [])] + \
+        [(synthetic(int(rows), arguments.trace_dir), int(rows))
+         for rows in arguments.sizes]
+    tasks = [(fname, engine, timing, arguments.payload)
+             for fname, rows in traces
+             for engine in arguments.engines
+             for timing in arguments.timings
+             if (timing != 'bit' or rows <= arguments.bit_max_rows) and
+             (engine != 'myhdl' or rows <= arguments.myhdl_max_rows)]
+    repeat = max(arguments.repeat, 1)
+
+    # one at a time, so they don't slow each other down,
+    # and a new process for each one
+    pool = Pool(1, maxtasksperchild=1)
+    results = []
+    repeats = []
+    print '--------------------------------------'
+    print '%-28s %-6s %-6s %9s %10s %10s %9s' % (
+        'Trace', 'Engine', 'Timing', 'Wall (s)', 'Events/s', 'Trans/s', 'RSS (MB)')
+    for run_record in pool.imap(run, [task for task in tasks
+                                      for i in range(repeat)]):
+
+        # wait for every repeat of the benchmark
+        repeats.append(run_record)
+        if len(repeats) < repeat:
+            continue
+        record = fastest(repeats)
+        repeats = []
+        results.append(record)
+        print '%-28s %-6s %-6s %9.2f %10s %10.0f %9.1f' % (
+            record['trace'], record['engine'], record['timing'],
+            record['wall_time'],
+            '%.0f' % record['events_per_sec'] if record['events_per_sec'] else '-',
+            record['transactions_per_sec'] or 0, record['peak_rss_mb'])
+        sys.stdout.flush()
+    pool.close()
+    pool.join()
+    print '--------------------------------------'
+
+    # compare with the last baseline
+    problems = []
+    if arguments.baseline:
+        with open(arguments.baseline) as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline['runs'], arguments.tolerance)
+        for record, problem in problems:
+            print '%s %s %s: %s' % (record['trace'], record['engine'],
+                                    record['timing'], problem)
+        if not problems:
+            print 'No regressions or mismatches against %s' % arguments.baseline
+        print '--------------------------------------'
+
+    # save as the next baseline
+    if arguments.save:
+        with open(arguments.save, 'w') as f:
+            json.dump({'machine': machine(), 'runs': results}, f, indent=1,
+                      sort_keys=True, separators=(',', ': '))
+
+    if problems:
+        exit(1)
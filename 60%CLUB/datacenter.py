@@ -0,0 +1,162 @@
+"""
+    Disk backed data center for the hub model
+
+    The data center keeps every line evicted from the hub, so with a
+    plain dict it grows with the length of the trace. datacenter
+    keeps memory bounded: a line is written through to an append only
+    log file when it is evicted, and only the most recently used lines
+    stay in memory, up to a cap in bytes. Every line in memory is
+    charged its payload plus a fixed overhead for its entry, so lines
+    without payload are bounded too. A read miss that isn't in memory
+    is read back from the log.
+
+    The log is a flat file of uint16 words. The index maps a tag to
+    where its latest line starts and how many words it has, so a line
+    that is evicted again just gets appended and the old copy is left
+    behind. Lines without payload are only a number of words, they
+    never go to the log.
+
+    It acts like the dict it replaces (data_center[tag] = line,
+    data_center[tag], tag in data_center) and counts how often a line
+    was found in memory and how many bytes went to and from the disk.
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+# use OrderedDict from collections package
+# keeps the lines in memory in order of use
+from collections import OrderedDict
+
+# scratch file for the log when no file is given
+from tempfile import TemporaryFile
+
+
+# default cap on the lines kept in memory, in bytes
+MEMORY_BYTES = 64 << 20
+
+# bytes charged for every line in memory besides its payload,
+# about what an OrderedDict entry with its tag costs
+ENTRY_BYTES = 100
+
+
+def line_bytes(line):
+    """ Memory a line is charged, payload and entry """
+    return getattr(line, 'nbytes', 0) + ENTRY_BYTES
+
+
+class datacenter:
+    """ Data center with an LRU tier in memory and a log on disk """
+
+    def __init__(self, memory_bytes=MEMORY_BYTES, fname=None):
+        """
+            :param input memory_bytes: most payload bytes kept in memory
+            :param input fname: file for the log, a temporary file
+                                that goes away on close() if None
+        """
+
+        # lines in memory, least recently used first
+        self.memory = OrderedDict()
+        self.memory_bytes = memory_bytes
+        self.used_bytes = 0
+
+        # append only log of words
+        if fname is None:
+            self.f = TemporaryFile()
+        else:
+            self.f = open(fname, 'w+b')
+        self.end = 0
+
+        # tag -> (offset in bytes, number of words)
+        # offset is None for lines without payload
+        self.index = {}
+
+        # counters
+        self.memory_hits = 0
+        self.memory_misses = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def __contains__(self, tag):
+        return tag in self.memory or tag in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __setitem__(self, tag, line):
+        """
+            Store an evicted line, written through to the log
+
+            :param input tag: tag of the line
+            :param input line: uint16 array of words, or the number
+                               of words for lines without payload
+        """
+        if isinstance(line, np.ndarray):
+
+            # append the words to the end of the log
+            data = line.astype('<u2').tobytes()
+            self.f.seek(self.end)
+            self.f.write(data)
+            self.index[tag] = (self.end, len(line))
+            self.end += len(data)
+            self.bytes_written += len(data)
+
+        else:
+
+            # only the size, nothing to write
+            self.index[tag] = (None, line)
+
+        self._keep(tag, line)
+
+    def __getitem__(self, tag):
+        """
+            Fetch a line, from memory if it's there, else from the log
+
+            :param input tag: tag of the line
+        """
+        if tag in self.memory:
+
+            # found in memory, now the most recently used
+            self.memory_hits += 1
+            line = self.memory.pop(tag)
+            self.memory[tag] = line
+            return line
+
+        # not in memory, read it back
+        self.memory_misses += 1
+        offset, words = self.index[tag]
+        if offset is None:
+            line = words
+        else:
+            self.f.seek(offset)
+            data = self.f.read(2*words)
+            self.bytes_read += len(data)
+            line = np.frombuffer(data, dtype='<u2').astype(np.uint16)
+
+        self._keep(tag, line)
+        return line
+
+    def _keep(self, tag, line):
+        """ Put a line in memory, dropping least recently used lines over the cap """
+        old = self.memory.pop(tag, None)
+        if old is not None:
+            self.used_bytes -= line_bytes(old)
+        self.memory[tag] = line
+        self.used_bytes += line_bytes(line)
+
+        # everything is in the log already, so just forget them
+        while self.used_bytes > self.memory_bytes and self.memory:
+            old = self.memory.popitem(last=False)[1]
+            self.used_bytes -= line_bytes(old)
+
+    def hit_rate(self):
+        """ Fraction of reads found in memory """
+        reads = self.memory_hits + self.memory_misses
+        return float(self.memory_hits)/reads if reads else 0.0
+
+    def close(self):
+        """ Close the log, a temporary log is deleted """
+        self.f.close()
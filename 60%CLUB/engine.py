@@ -0,0 +1,213 @@
+"""
+    Lightweight discrete event engine for the hub model
+
+    The hub model only needs a clock, now() and delay() from MyHDL.
+    This module provides the same generator protocol on top of a
+    heapq priority queue, so the simulation can run without
+    importing MyHDL at all.
+
+    Generators may yield:
+        delay(n)   -- resume n clock cycles later
+        generator  -- run it to completion, then resume
+        tuple      -- resume when the first of the clauses (delays or
+                      generators) triggers, like MyHDL. Generators in
+                      the tuple run as processes of their own and keep
+                      going, so yield gen, delay(0) starts gen in the
+                      background
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use heapq for the event queue, ordered by time
+from heapq import heappush, heappop
+
+# used to recognize generators yielded as sub processes
+from types import GeneratorType
+
+
+# current simulation time in clock cycles
+_time = 0
+
+
+class StopSimulation(Exception):
+    """ Raised when the simulation is over """
+    pass
+
+
+def now():
+    """ Return the current simulation time """
+    return _time
+
+
+class delay(object):
+    """ Yield one of these to wait for a number of clock cycles """
+
+    __slots__ = ('_time',)
+
+    def __init__(self, val):
+        """
+            :param input val: natural integer, clock cycles to wait
+        """
+        if val < 0:
+            raise TypeError('arg of delay constructor should be a natural integer')
+        self._time = val
+
+
+class _trigger(object):
+    """ Resumes a call stack waiting on a tuple, only the first time """
+
+    __slots__ = ('stack',)
+
+    def __init__(self, stack):
+        """
+            :param input stack: call stack waiting on the tuple
+        """
+        self.stack = stack
+
+    def take(self):
+        """ Call stack to resume, None if it was resumed already """
+        stack = self.stack
+        self.stack = None
+        return stack
+
+
+class Simulation(object):
+    """ Event driven simulation of one or more generators """
+
+    def __init__(self, *args):
+        """
+            Initialization, resets the clock and schedules the
+            generators to start at time 0
+
+            :param input args: generators to simulate
+        """
+        global _time
+
+        # restart the clock
+        _time = 0
+
+        # event queue of (time, sequence number, call stack or trigger)
+        # the sequence number keeps events at the same time in order
+        self._queue = []
+        self._seq = 0
+
+        # number of times a generator was resumed
+        self.events = 0
+
+        # every generator starts at time 0 with its own call stack
+        for gen in args:
+            self._schedule(0, [gen])
+
+    def _schedule(self, t, stack):
+        """
+            Put a call stack on the event queue
+
+            :param input t:     time to resume
+            :param input stack: call stack of generators
+        """
+        heappush(self._queue, (t, self._seq, stack))
+        self._seq += 1
+
+    def _resume(self, stack):
+        """
+            Run a call stack until it waits on a delay or finishes
+
+            :param input stack: call stack of generators, a process
+                                started from a tuple has the trigger
+                                of its caller at the bottom
+        """
+        while stack:
+
+            # process from a tuple finished, its caller goes on
+            # right away unless another clause beat it
+            if isinstance(stack[-1], _trigger):
+                stack = stack[-1].take()
+                if stack is None:
+                    return
+                continue
+
+            # count every resumption
+            self.events += 1
+
+            # run the innermost generator up to its next yield
+            try:
+                clause = next(stack[-1])
+
+            # generator finished, return to the caller
+            except StopIteration:
+                stack.pop()
+                continue
+
+            if isinstance(clause, delay):
+
+                # wait, resume later on
+                self._schedule(_time + clause._time, stack)
+                return
+
+            elif isinstance(clause, GeneratorType):
+
+                # sub process, runs now and caller resumes when done
+                stack.append(clause)
+
+            elif isinstance(clause, tuple):
+
+                # wait for whichever clause comes first
+                trigger = _trigger(stack)
+                for item in clause:
+                    if isinstance(item, delay):
+                        self._schedule(_time + item._time, trigger)
+                    elif isinstance(item, GeneratorType):
+                        self._schedule(_time, [trigger, item])
+                    else:
+                        raise TypeError('yield clause %r has type %s' %
+                                        (item, type(item)))
+                return
+
+            else:
+                raise TypeError('yield clause %r has type %s' %
+                                (clause, type(clause)))
+
+    def run(self, duration=None, quiet=0):
+        """
+            Run the simulation
+
+            :param input duration: clock cycles to run for, None runs
+                                   until there are no more events
+            :param input quiet:    don't print the end of simulation message
+
+            Returns 1 when suspended after duration, 0 when finished
+        """
+        global _time
+
+        # time at which to suspend the simulation
+        if duration is None:
+            maxTime = None
+        else:
+            maxTime = _time + duration
+
+        queue = self._queue
+        while queue:
+
+            # suspend if next event is past the requested duration
+            if maxTime is not None and queue[0][0] > maxTime:
+                _time = maxTime
+                return 1
+
+            # advance the clock straight to the next event
+            t, seq, stack = heappop(queue)
+            _time = t
+
+            # delay of a tuple, only if nothing else resumed the caller
+            if isinstance(stack, _trigger):
+                stack = stack.take()
+                if stack is None:
+                    continue
+
+            # let the generators do their thing
+            self._resume(stack)
+
+        # nothing left to do
+        if not quiet:
+            print '%s: No more events' % StopSimulation.__name__
+        return 0
@@ -0,0 +1,196 @@
+"""
+    Event log for the hub model
+
+    The hub and caches report what they are doing through an event
+    log instead of printing. The log has a level:
+
+        summary     -- nothing during the run, only the final stats
+        transaction -- SEND/REQUEST, hits, misses, evictions
+        word        -- also every 16 bit word on the databus
+
+    Callers check the log.transactions/log.words flags before calling
+    write(), so at summary level no event is built or formatted.
+
+    Events go to a buffered sink:
+
+        text   -- the familiar print out, one line per event
+        jsonl  -- one JSON object per line
+        binary -- fixed size records, see binarysink
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# used for the jsonl sink
+import json
+
+# used for the binary sink
+import struct
+
+# stdout is the default destination
+import sys
+
+
+""" log levels """
+SUMMARY = 0
+TRANSACTION = 1
+WORD = 2
+
+LEVELS = {'summary': SUMMARY, 'transaction': TRANSACTION, 'word': WORD}
+
+
+""" event kinds: code, field names, text format """
+KINDS = {
+    'send':      (0, ('tag', 'ts'),      '%s: SEND tag %s size %s'),
+    'sent':      (1, ('tag', 'ts'),      '%s: SENT tag %s size %s'),
+    'request':   (2, ('tag',),           '%s: REQUEST tag %s'),
+    'fulfilled': (3, ('level',),         '%s REQUEST fulfilled by L%s'),
+    'read_hit':  (4, (),                 '%s: Read request hit, receiving bytes from memory'),
+    'read_miss': (5, (),                 '%s: Read request miss, contacting data center...'),
+    'evict':     (6, ('tag',),           '%s: EVICT %s, contacting data center...'),
+    'dc_done':   (7, ('elapsed',),       '%s: Done communicating with data center...time elapsed: %s'),
+    'word':      (8, ('word', 'value'),  '%s: Word %s = %s'),
+    'merged':    (9, ('tag',),           '%s: Read request miss on %s merged with the outstanding one'),
+    'drop':      (10, ('tag',),          '%s: EVICT %s, clean, data center has it already'),
+    'write_through': (11, ('tag',),      '%s: WRITE THROUGH %s, contacting data center...'),
+    'not_found': (12, ('tag',),          '%s: Data center has no line for %s'),
+    'demote':    (13, ('tag',),          '%s: EVICT %s, moving it to L2'),
+    'victim':    (14, ('tag',),          '%s: EVICT %s, moving it to the victim buffer'),
+    'peer_hit':  (15, ('tag',),          '%s: Read request miss, %s found in the other level'),
+    'victim_hit': (16, ('tag',),         '%s: Read request miss, %s found in the victim buffer'),
+}
+
+
+def number(value):
+    """
+        Integer value of an event field, hex strings like '0xbeef'
+        or '0x1L' are converted
+
+        :param input value: field value
+    """
+    if isinstance(value, basestring):
+        return int(value.rstrip('L'), 16)
+    return int(value)
+
+
+class textsink:
+    """ Buffered plain text, same lines the hub used to print """
+
+    def __init__(self, f, buffer_size=4096):
+        """
+            :param input f: file object to write to
+            :param input buffer_size: number of lines kept before writing
+        """
+        self.f = f
+        self.buffer = []
+        self.buffer_size = buffer_size
+
+    def write(self, time, kind, fields):
+        self.buffer.append(KINDS[kind][2] % ((time,) + fields))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.buffer.append('')
+            self.f.write('\n'.join(self.buffer))
+            self.buffer = []
+        self.f.flush()
+
+
+class jsonsink(textsink):
+    """ Buffered JSON lines, one object per event """
+
+    def write(self, time, kind, fields):
+        event = {'time': int(time), 'event': kind}
+        for name, value in zip(KINDS[kind][1], fields):
+            event[name] = number(value)
+        self.buffer.append(json.dumps(event))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+
+class binarysink(textsink):
+    """
+        Buffered fixed size binary records
+
+        The file starts with the 8 byte magic HUBLOG1 and a newline.
+        Every event is 33 bytes, little endian: uint8 kind code,
+        uint64 time and three int64 fields (unused fields are 0).
+    """
+
+    # header and record layout
+    MAGIC = 'HUBLOG1\n'
+    RECORD = struct.Struct('<BQqqq')
+
+    def __init__(self, f, buffer_size=4096):
+        textsink.__init__(self, f, buffer_size)
+        f.write(self.MAGIC)
+
+    def write(self, time, kind, fields):
+        values = [number(value) for value in fields] + [0]*(3 - len(fields))
+        self.buffer.append(self.RECORD.pack(KINDS[kind][0], time, *values))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.f.write(''.join(self.buffer))
+            self.buffer = []
+        self.f.flush()
+
+
+SINKS = {'text': textsink, 'jsonl': jsonsink, 'binary': binarysink}
+
+
+class eventlog:
+    """ Leveled event log in front of a sink """
+
+    def __init__(self, level=SUMMARY, sink=None):
+        """
+            :param input level: SUMMARY, TRANSACTION or WORD
+            :param input sink: where events go, defaults to text on stdout
+        """
+        if sink is None:
+            sink = textsink(sys.stdout)
+        self.sink = sink
+        self.level = level
+
+        # flags checked on the hot path before building an event
+        self.transactions = level >= TRANSACTION
+        self.words = level >= WORD
+
+    def write(self, time, kind, *fields):
+        """
+            Log an event, callers check the level flags first
+
+            :param input time: simulation time of the event
+            :param input kind: name of the event, see KINDS
+            :param input fields: values of the event fields
+        """
+        self.sink.write(time, kind, fields)
+
+    def flush(self):
+        """ Write out everything buffered so far """
+        self.sink.flush()
+
+    def close(self):
+        """ Flush and close the destination, unless it is stdout """
+        self.sink.flush()
+        if self.sink.f is not sys.stdout:
+            self.sink.f.close()
+
+
+def open_log(level='summary', fname=None, fmt='text'):
+    """
+        Create an event log
+
+        :param input level: 'summary', 'transaction' or 'word'
+        :param input fname: file to write to, None for stdout
+        :param input fmt: 'text', 'jsonl' or 'binary'
+    """
+    if fname is None:
+        f = sys.stdout
+    else:
+        f = open(fname, 'wb' if fmt == 'binary' else 'w')
+    return eventlog(LEVELS[level], SINKS[fmt](f))
@@ -0,0 +1,286 @@
+"""
+    Profiling hooks for the hub model
+
+    Shows where the wall time of a simulation goes. While a profiler
+    is enabled the generators of the hub model (the hub, and the
+    access, fill, eviction and data center transfers of every cache)
+    and the functions they lean on (making the payload, the data
+    center, the event log) are wrapped, so every resumption of a
+    generator and every call is timed and counted. Time that isn't
+    spent in any of them is the engine scheduling the generators.
+
+    Every phase is known by where it was started from, like
+    hub;L1.access;L1.makeRoom;L1.evict, so the time can be shown per
+    phase or as a flame graph: the collapsed stack file has a line
+    per path with its time in microseconds, the input of
+    flamegraph.pl and speedscope.
+
+    Nothing is wrapped until the profiler is enabled and everything
+    is put back when it is disabled, so there is no cost otherwise.
+    While enabled the wrappers roughly double the wall time; what
+    they cost outside the phases is measured when the profiler is
+    enabled and shown as its own line instead of as engine time.
+
+        p = profiler()
+        with p:
+            sim.simulate(trace)
+        p.report()
+        p.collapsed('sim.folded')
+
+    or python sim.py -f traffic.csv -b --profile --profile-file sim.folded
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# generator functions are driven, plain functions are just timed
+from inspect import isgeneratorfunction
+
+# wall clock with the best resolution on the platform
+from timeit import default_timer as clock
+
+# the parts of the model that get wrapped, besides sim.py
+import eventlog
+import datacenter
+
+
+""" cache methods that get wrapped, by what they do """
+CACHE_METHODS = [
+    # hub dispatch goes to these
+    'access',
+    # read hits going to the devices
+    'readout',
+    # making room and filling lines from the devices
+    'makeRoom', 'fill', 'receive', 'place', 'install',
+    # lines leaving the cache
+    'evict', 'retire', 'writeback',
+    # lines coming from the data center or another level
+    'fetch', 'merge', 'local',
+    # making the payload of a line
+    'new_line',
+]
+
+# other functions, (object, attribute, name in the profile)
+OTHERS = [
+    (eventlog.eventlog, 'write', 'log'),
+    (eventlog.eventlog, 'flush', 'log'),
+    (datacenter.datacenter, '__setitem__', 'data_center'),
+    (datacenter.datacenter, '__getitem__', 'data_center'),
+]
+
+# name of the time spent outside every phase
+ENGINE = 'engine'
+
+# name of the time the wrappers themselves take
+PROFILER = 'profiler'
+
+# resumptions timed to find out what the wrappers cost
+CALIBRATION = 20000
+
+
+def _idle(n):
+    """ Generator that does nothing n times, for calibrating """
+    for i in xrange(n):
+        yield i
+
+
+class profiler:
+    """ Wall time and resumptions of the phases of the hub model """
+
+    def __init__(self, model=None):
+        """
+            :param input model: the sim module to wrap, defaults to
+                                importing sim. sim.py passes itself
+                                when it runs as a script
+        """
+        if model is None:
+            import sim as model
+        self.model = model
+
+        # path -> seconds spent in it, not counting what it called
+        self.self_time = {}
+
+        # path -> times resumed or called
+        self.resumes = {}
+
+        # open phases, [path, started, time in the phases it called]
+        self.stack = []
+
+        # path of the phase running now, new generators hang under it
+        self.path = ()
+
+        # originals of what was wrapped, to put back
+        self.saved = []
+
+        # wall time from enable to disable
+        self.started = None
+        self.total = 0.0
+
+        # seconds a resumption costs outside the timed phases,
+        # driving the generator and passing on what it yields
+        self.overhead = None
+
+    def enter(self, path):
+        """ A phase starts running """
+        self.stack.append([path, clock(), 0.0])
+        self.path = path
+
+    def leave(self):
+        """ The phase that is running stops """
+        path, started, inner = self.stack.pop()
+        elapsed = clock() - started
+        self.self_time[path] = self.self_time.get(path, 0.0) + elapsed - inner
+        self.resumes[path] = self.resumes.get(path, 0) + 1
+
+        # the time is the caller's, but not its own
+        if self.stack:
+            self.stack[-1][2] += elapsed
+            self.path = self.stack[-1][0]
+        else:
+            self.path = ()
+
+    def drive(self, gen, path):
+        """
+            Run a generator one resumption at a time, timing each one
+
+            Yields what the generator yields, so the engine can't tell
+            the difference.
+
+            :param input gen: the generator
+            :param input path: its phase
+        """
+        while True:
+            self.enter(path)
+            try:
+                clause = next(gen)
+            except StopIteration:
+                return
+            finally:
+                self.leave()
+            yield clause
+
+    def wrap(self, function, name):
+        """
+            Wrapped version of a function or generator function
+
+            :param input function: the original
+            :param input name: name of the phase, a function of the
+                               first argument to tell the caches apart
+        """
+        profiler = self
+        if isgeneratorfunction(function):
+            def wrapper(*args, **kwargs):
+                path = profiler.path + (name(args),)
+                return profiler.drive(function(*args, **kwargs), path)
+        else:
+            def wrapper(*args, **kwargs):
+                profiler.enter(profiler.path + (name(args),))
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    profiler.leave()
+        return wrapper
+
+    def patch(self, owner, attribute, function):
+        """ Replace an attribute, remembering the original """
+        self.saved.append((owner, attribute, owner.__dict__[attribute]))
+        setattr(owner, attribute, function)
+
+    def calibrate(self):
+        """ Find out what a resumption costs outside the timed phases """
+        probe = profiler(self.model)
+        started = clock()
+        for clause in _idle(CALIBRATION):
+            pass
+        plain = clock() - started
+        started = clock()
+        for clause in probe.drive(_idle(CALIBRATION), ('idle',)):
+            pass
+        driven = clock() - started
+        inside = sum(probe.self_time.values())
+        self.overhead = max(driven - inside - plain, 0.0)/CALIBRATION
+
+    def enable(self):
+        """ Wrap the model and start the clock """
+        if self.overhead is None:
+            self.calibrate()
+        model = self.model
+        self.patch(model, 'hub', self.wrap(model.hub, lambda args: 'hub'))
+        for method in CACHE_METHODS:
+            function = model.cache.__dict__[method]
+            self.patch(model.cache, method, self.wrap(
+                function, lambda args, method=method:
+                '%s.%s' % (getattr(args[0], 'name', 'cache'), method)))
+        for owner, attribute, name in OTHERS:
+            function = owner.__dict__[attribute]
+            self.patch(owner, attribute, self.wrap(
+                function, lambda args, name=name: name))
+        self.started = clock()
+
+    def disable(self):
+        """ Stop the clock and put the model back """
+        self.total += clock() - self.started
+        while self.saved:
+            owner, attribute, function = self.saved.pop()
+            setattr(owner, attribute, function)
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def profiler_time(self):
+        """ Estimated time the wrappers took outside the phases """
+        return self.overhead*sum(self.resumes.values()) if self.overhead else 0.0
+
+    def engine_time(self):
+        """ Time spent outside every phase, scheduling the generators """
+        return max(self.total - sum(self.self_time.values()) -
+                   self.profiler_time(), 0.0)
+
+    def phases(self):
+        """
+            Time and resumptions per phase, slowest first
+
+            Returns a list of (phase, seconds, resumptions), a phase
+            being the last part of the paths, plus the engine and
+            the estimated cost of the profiler
+        """
+        time = {}
+        count = {}
+        for path, seconds in self.self_time.items():
+            time[path[-1]] = time.get(path[-1], 0.0) + seconds
+            count[path[-1]] = count.get(path[-1], 0) + self.resumes[path]
+        rows = [(phase, time[phase], count[phase]) for phase in time]
+        rows.append((ENGINE, self.engine_time(), None))
+        rows.append((PROFILER, self.profiler_time(), None))
+        rows.sort(key=lambda row: -row[1])
+        return rows
+
+    def report(self):
+        """ Nice print out of where the time went """
+        total = self.total or 1.0
+        print '--------------------------------------'
+        print 'Profile: %3.2f seconds of wall time' % self.total
+        print '%-16s  %10s  %6s  %12s  %12s' % (
+            'Phase', 'Time (s)', '%', 'Resumptions', 'us each')
+        for phase, seconds, count in self.phases():
+            print '%-16s  %10.3f  %6.1f  %12s  %12s' % (
+                phase, seconds, 100*seconds/total,
+                '-' if count is None else count,
+                '%.2f' % (1e6*seconds/count) if count else '-')
+        print '--------------------------------------'
+
+    def collapsed(self, fname):
+        """
+            Write the collapsed stacks for a flame graph
+
+            :param input fname: file to write to
+        """
+        with open(fname, 'w') as f:
+            for path in sorted(self.self_time):
+                f.write('%s %d\n' % (';'.join(path), round(1e6*self.self_time[path])))
+            f.write('%s %d\n' % (ENGINE, round(1e6*self.engine_time())))
+            f.write('%s %d\n' % (PROFILER, round(1e6*self.profiler_time())))
@@ -0,0 +1,296 @@
+"""
+    Latency histograms of the hub model
+
+    The hub records the latency of every transaction (from the hub
+    starting on it until the device is done with it, in clock cycles)
+    by device, operation (send or request), cache level (L1 or L2)
+    and result (hit or miss). Every combination gets a histogram with
+    log sized buckets like HdrHistogram: values below 2**precision
+    get a bucket each, and every power of two above that is split into
+    2**(precision - 1) buckets. A bucket is never wider than 1/128 of
+    the values in it (with the default precision of 8), so the
+    percentiles are that close, and a histogram has the same few
+    thousand counters whether it holds ten transactions or ten million.
+    Count, sum, min and max are kept exactly.
+
+    The histograms are exported with p50/p95/p99/max in seconds as
+
+        csv         a row per device, operation, level and result
+        json        the same, plus the counts of the non empty buckets
+                    so histograms of several runs can be merged
+        prometheus  text exposition format, a summary with quantiles,
+                    _sum and _count, and a _max gauge
+
+        python sim.py -f traffic.csv -b --metrics latency.prom
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+# exports
+import json
+from math import ceil
+
+
+# bits of the values that have a bucket of their own
+PRECISION = 8
+
+# values are clock cycles, never more than 64 bits
+VALUE_BITS = 64
+
+# percentiles that get exported
+QUANTILES = (0.5, 0.95, 0.99)
+
+# what the histograms are broken out by, in order
+LABELS = ('device', 'op', 'level', 'result')
+
+# name of the metric in the prometheus format
+METRIC = 'hub_latency_seconds'
+
+
+class histogram:
+    """ Counts of values in log sized buckets, fixed memory """
+
+    def __init__(self, precision=PRECISION):
+        """
+            :param input precision: values below 2**precision are
+                                    exact, bigger ones are within
+                                    1/2**(precision - 1)
+        """
+        self.precision = precision
+
+        # values with a bucket each, buckets per power of two above that
+        self.linear = 1 << precision
+        self.half = self.linear >> 1
+
+        # every bucket there can be, allocated once, a list is
+        # quicker than an array to count one value at a time
+        self.counts = [0]*(self.linear + (VALUE_BITS - precision)*self.half)
+
+        # exact summary
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def index(self, value):
+        """ Bucket of a value """
+        if value < self.linear:
+            return value
+
+        # top precision bits of the value pick the bucket
+        shift = value.bit_length() - self.precision
+        return self.linear + (shift - 1)*self.half + (value >> shift) - self.half
+
+    def highest(self, index):
+        """ Biggest value that goes in a bucket """
+        if index < self.linear:
+            return index
+        shift, sub = divmod(index - self.linear, self.half)
+        shift += 1
+        return ((sub + self.half + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        """
+            Add a value
+
+            :param input value: clock cycles, not negative
+            :param input count: times it happened
+        """
+        value = int(value)
+        self.counts[self.index(value)] += count
+        self.count += count
+        self.total += value*count
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """ Add the values of another histogram of the same precision """
+        if other.precision != self.precision:
+            raise ValueError('histograms have different precisions')
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, quantiles=QUANTILES):
+        """
+            Values below which the given fractions of the values are
+
+            Returns a list, the biggest value of the bucket the
+            percentile falls in but never more than the max
+
+            :param input quantiles: fractions between 0 and 1
+        """
+        if not self.count:
+            return [0 for q in quantiles]
+        cumulative = np.cumsum(self.counts)
+        result = []
+        for q in quantiles:
+            rank = max(int(ceil(q*self.count)), 1)
+            index = int(np.searchsorted(cumulative, rank))
+            result.append(min(self.highest(index), self.max))
+        return result
+
+    def mean(self):
+        """ Average value """
+        return float(self.total)/self.count if self.count else 0.0
+
+    def buckets(self):
+        """ (biggest value, count) of the buckets that aren't empty """
+        return [(self.highest(i), count)
+                for i, count in enumerate(self.counts) if count]
+
+
+class metrics:
+    """ Latency histograms of the transactions, by LABELS """
+
+    def __init__(self, cycle, precision=PRECISION):
+        """
+            :param input cycle: seconds per clock cycle, the exports
+                                are in seconds
+            :param input precision: precision of every histogram
+        """
+        self.cycle = cycle
+        self.precision = precision
+
+        # (device, op, level, result) -> histogram
+        self.histograms = {}
+
+    def record(self, value, device, op, level, result):
+        """
+            Add the latency of a transaction
+
+            :param input value: latency in clock cycles
+            :param input device: device ID
+            :param input op: 'send' or 'request'
+            :param input level: cache level, 'L1' or 'L2'
+            :param input result: 'hit' or 'miss'
+        """
+        key = (device, op, level, result)
+        h = self.histograms.get(key)
+        if h is None:
+            h = self.histograms[key] = histogram(self.precision)
+        h.record(value)
+
+    def by(self, *labels):
+        """
+            Histograms merged over the labels that aren't given
+
+            Returns a dict of label values -> histogram
+
+            :param input labels: names from LABELS to keep
+        """
+        keep = [LABELS.index(label) for label in labels]
+        result = {}
+        for key, h in self.histograms.items():
+            group = tuple(key[i] for i in keep)
+            if group not in result:
+                result[group] = histogram(self.precision)
+            result[group].merge(h)
+        return result
+
+    def summary(self):
+        """
+            Every histogram summed up, in seconds
+
+            Returns a list of dicts with the labels, count, sum, mean,
+            min, p50, p95, p99 and max, sorted by the labels
+        """
+        rows = []
+        for key in sorted(self.histograms):
+            h = self.histograms[key]
+            row = dict(zip(LABELS, key))
+            row['count'] = h.count
+            row['sum'] = h.total*self.cycle
+            row['mean'] = h.mean()*self.cycle
+            row['min'] = (h.min or 0)*self.cycle
+            row['max'] = h.max*self.cycle
+            for q, value in zip(QUANTILES, h.percentiles()):
+                row['p%d' % round(100*q)] = value*self.cycle
+            rows.append(row)
+        return rows
+
+    def write_csv(self, fname):
+        """
+            Write a row per histogram
+
+            :param input fname: file to write to
+        """
+        columns = list(LABELS) + ['count', 'sum', 'mean', 'min', 'p50',
+                                  'p95', 'p99', 'max']
+        with open(fname, 'w') as f:
+            f.write(','.join(columns) + '\n')
+            for row in self.summary():
+                f.write(','.join([str(row[c]) if c in LABELS or c == 'count'
+                                  else repr(row[c]) for c in columns]) + '\n')
+
+    def write_json(self, fname):
+        """
+            Write the summaries and non empty buckets of the histograms
+
+            :param input fname: file to write to
+        """
+        rows = self.summary()
+        for row in rows:
+            key = tuple(row[label] for label in LABELS)
+            row['buckets'] = [[value*self.cycle, count] for value, count
+                              in self.histograms[key].buckets()]
+        with open(fname, 'w') as f:
+            json.dump({'unit': 'seconds', 'precision': self.precision,
+                       'histograms': rows}, f, indent=1, sort_keys=True,
+                      separators=(',', ': '))
+
+    def write_prometheus(self, fname):
+        """
+            Write the histograms in the prometheus text format
+
+            :param input fname: file to write to
+        """
+        rows = self.summary()
+        labels = ['{%s' % ','.join(['%s="%s"' % (label, row[label])
+                                    for label in LABELS]) for row in rows]
+        with open(fname, 'w') as f:
+            f.write('# HELP %s Latency of hub transactions, from the hub '
+                    'starting on one until the device is done\n' % METRIC)
+            f.write('# TYPE %s summary\n' % METRIC)
+            for row, label in zip(rows, labels):
+                for q in QUANTILES:
+                    f.write('%s%s,quantile="%s"} %r\n' % (
+                        METRIC, label, q, row['p%d' % round(100*q)]))
+                f.write('%s_sum%s} %r\n' % (METRIC, label, row['sum']))
+                f.write('%s_count%s} %d\n' % (METRIC, label, row['count']))
+            f.write('# HELP %s_max Longest hub transaction\n' % METRIC)
+            f.write('# TYPE %s_max gauge\n' % METRIC)
+            for row, label in zip(rows, labels):
+                f.write('%s_max%s} %r\n' % (METRIC, label, row['max']))
+
+    def write(self, fname, fmt=None):
+        """
+            Write the histograms to a file
+
+            :param input fname: file to write to
+            :param input fmt: 'csv', 'json' or 'prometheus', by default
+                              picked by the extension (.json, .prom),
+                              else csv
+        """
+        if fmt is None:
+            if fname.endswith('.json'):
+                fmt = 'json'
+            elif fname.endswith('.prom'):
+                fmt = 'prometheus'
+            else:
+                fmt = 'csv'
+        if fmt == 'json':
+            self.write_json(fname)
+        elif fmt == 'prometheus':
+            self.write_prometheus(fname)
+        else:
+            self.write_csv(fname)
@@ -0,0 +1,381 @@
+"""
+    Replacement policies for the hub caches
+
+    Every policy keeps track of the tags in one cache and answers
+    one question: which tag should be evicted to make room for a new
+    one. All operations are constant time (amortized), so eviction
+    cost does not grow with the size of the cache.
+
+    The cache calls:
+        insert(tag) -- a new line was filled
+        touch(tag)  -- a line was hit
+        victim(tag) -- cache is full and tag is coming in, pick a line
+                       to evict and stop tracking it
+        remove(tag) -- a line left the cache for any other reason,
+                       does nothing for tags that are not tracked
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use OrderedDict from collections package
+# keeps tags in order of insertion/use
+from collections import OrderedDict
+
+# seeded random number generator for random replacement
+from random import Random
+
+
+class FIFO(object):
+    """ First in first out """
+
+    def __init__(self, capacity, seed=None):
+        """
+            :param input capacity: number of lines in the cache
+            :param input seed:     not used
+        """
+
+        # tags in order of insertion, oldest first
+        self.order = OrderedDict()
+
+    def insert(self, tag):
+        self.order[tag] = True
+
+    def touch(self, tag):
+        # hits don't change the order
+        pass
+
+    def victim(self, tag=None):
+        # first one in is the first one out
+        return self.order.popitem(last=False)[0]
+
+    def remove(self, tag):
+        self.order.pop(tag, None)
+
+
+class LRU(FIFO):
+    """ Least recently used """
+
+    def touch(self, tag):
+        # move tag to the back of the recency order
+        self.order.pop(tag, None)
+        self.order[tag] = True
+
+
+class LFU(object):
+    """
+        Least frequently used, ties broken by least recently used
+
+        Tags are kept in buckets by use count, and the counts that
+        have a bucket are linked in order, so the smallest count is
+        always at hand and picking a victim never scans the cache.
+    """
+
+    def __init__(self, capacity, seed=None):
+        """
+            :param input capacity: number of lines in the cache
+            :param input seed:     not used
+        """
+
+        # use count of every tag
+        self.count = {}
+
+        # tags with the same use count, least recently used first
+        self.buckets = {}
+
+        # counts that have a bucket, linked in order: next bigger and
+        # next smaller count, 0 is the head so higher[0] is the
+        # smallest use count in the cache
+        self.higher = {0: None}
+        self.lower = {}
+
+    def _bucket(self, n, below):
+        """ Bucket for use count n, created right above count below """
+        if n not in self.buckets:
+            self.buckets[n] = OrderedDict()
+
+            # link it in between below and the count above that
+            above = self.higher[below]
+            self.higher[below] = n
+            self.higher[n] = above
+            self.lower[n] = below
+            if above is not None:
+                self.lower[above] = n
+        return self.buckets[n]
+
+    def _unlink(self, tag):
+        """ Take tag out of its bucket, returns its use count """
+        n = self.count.pop(tag)
+        bucket = self.buckets[n]
+        del bucket[tag]
+
+        # empty bucket, link its neighbours to each other
+        if not bucket:
+            del self.buckets[n]
+            below = self.lower.pop(n)
+            above = self.higher.pop(n)
+            self.higher[below] = above
+            if above is not None:
+                self.lower[above] = below
+        return n
+
+    def insert(self, tag):
+        # nothing is used less than a new tag
+        self.count[tag] = 1
+        self._bucket(1, 0)[tag] = True
+
+    def touch(self, tag):
+        if tag not in self.count:
+            return
+
+        # next bucket goes right above this one, before it can empty
+        n = self.count[tag]
+        bucket = self._bucket(n + 1, n)
+        self._unlink(tag)
+        self.count[tag] = n + 1
+        bucket[tag] = True
+
+    def victim(self, tag=None):
+        # oldest tag in the least used bucket
+        old_tag = next(iter(self.buckets[self.higher[0]]))
+        self.remove(old_tag)
+        return old_tag
+
+    def remove(self, tag):
+        if tag in self.count:
+            self._unlink(tag)
+
+
+class ARC(object):
+    """
+        Adaptive replacement cache (Megiddo & Modha)
+
+        T1 holds lines seen once recently, T2 lines seen at least
+        twice. B1/B2 remember tags recently evicted from T1/T2 and
+        steer the target size p of T1. A burst of one time writes only
+        churns T1, so lines that are reused survive in T2.
+    """
+
+    def __init__(self, capacity, seed=None):
+        """
+            :param input capacity: number of lines in the cache
+            :param input seed:     not used
+        """
+
+        # number of lines in the cache
+        self.c = capacity
+
+        # target size for T1
+        self.p = 0
+
+        # resident lists and ghost lists, least recently used first
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+
+        # tag that victim() already made room for, so insert()
+        # doesn't adapt p or trim the ghost lists a second time
+        self.prepared = None
+
+    def _adapt(self, tag):
+        """ Ghost hit on tag, move the target size of T1 """
+        if tag in self.b1:
+            self.p = min(self.c, self.p + max(len(self.b2) / len(self.b1), 1))
+        elif tag in self.b2:
+            self.p = max(0, self.p - max(len(self.b1) / len(self.b2), 1))
+
+    def _replace(self, tag):
+        """ Evict from T1 or T2 according to p, remembering it in B1/B2 """
+        if self.t1 and (not self.t2 or len(self.t1) > self.p or
+                        (tag in self.b2 and len(self.t1) == self.p)):
+            old_tag = self.t1.popitem(last=False)[0]
+            self.b1[old_tag] = True
+        else:
+            old_tag = self.t2.popitem(last=False)[0]
+            self.b2[old_tag] = True
+        return old_tag
+
+    def insert(self, tag):
+        if tag in self.b1 or tag in self.b2:
+
+            # ghost hit while the cache had room, adapt now
+            if self.prepared != tag:
+                self._adapt(tag)
+
+            # seen before, straight into T2
+            self.b1.pop(tag, None)
+            self.b2.pop(tag, None)
+            self.t2[tag] = True
+
+        else:
+
+            # keep the ghost lists at most c tags combined with T1/T2
+            if self.prepared != tag:
+                if len(self.t1) + len(self.b1) >= self.c and self.b1:
+                    self.b1.popitem(last=False)
+                total = len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2)
+                if total >= 2*self.c and self.b2:
+                    self.b2.popitem(last=False)
+
+            # first time seen, into T1
+            self.t1[tag] = True
+
+        self.prepared = None
+
+    def touch(self, tag):
+        # any hit makes it a frequent line
+        if tag in self.t1:
+            del self.t1[tag]
+            self.t2[tag] = True
+        elif tag in self.t2:
+            del self.t2[tag]
+            self.t2[tag] = True
+
+    def victim(self, tag=None):
+        self.prepared = tag
+
+        if tag in self.b1 or tag in self.b2:
+
+            # ghost hit, adapt p before picking the victim
+            self._adapt(tag)
+            return self._replace(tag)
+
+        # new tag, keep the directory bounded
+        if len(self.t1) + len(self.b1) >= self.c:
+            if len(self.t1) < self.c:
+                self.b1.popitem(last=False)
+            else:
+                # T1 is the whole cache, evict without a ghost
+                return self.t1.popitem(last=False)[0]
+        else:
+            total = len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2)
+            if total >= 2*self.c and self.b2:
+                self.b2.popitem(last=False)
+
+        return self._replace(tag)
+
+    def remove(self, tag):
+        self.t1.pop(tag, None)
+        self.t2.pop(tag, None)
+
+
+class TwoQ(object):
+    """
+        Full 2Q (Johnson & Shasha)
+
+        New lines go into the A1in FIFO. Lines evicted from A1in are
+        remembered in the A1out ghost FIFO, and only a line that comes
+        back while remembered is promoted to the Am LRU. A scan of one
+        time writes passes through A1in without flushing Am.
+    """
+
+    def __init__(self, capacity, seed=None):
+        """
+            :param input capacity: number of lines in the cache
+            :param input seed:     not used
+        """
+
+        # target size of A1in and A1out, as in the paper
+        self.kin = max(1, capacity/4)
+        self.kout = max(1, capacity/2)
+
+        # A1in and Am resident, A1out ghost, oldest first
+        self.a1in = OrderedDict()
+        self.a1out = OrderedDict()
+        self.am = OrderedDict()
+
+    def insert(self, tag):
+        if tag in self.a1out:
+
+            # came back while remembered, it is hot
+            del self.a1out[tag]
+            self.am[tag] = True
+
+        else:
+            self.a1in[tag] = True
+
+    def touch(self, tag):
+        # hits in A1in don't count, hits in Am are LRU
+        if tag in self.am:
+            del self.am[tag]
+            self.am[tag] = True
+
+    def victim(self, tag=None):
+        if len(self.a1in) > self.kin or not self.am:
+
+            # oldest of A1in, remember it in A1out
+            old_tag = self.a1in.popitem(last=False)[0]
+            self.a1out[old_tag] = True
+            if len(self.a1out) > self.kout:
+                self.a1out.popitem(last=False)
+            return old_tag
+
+        # least recently used of Am
+        return self.am.popitem(last=False)[0]
+
+    def remove(self, tag):
+        self.a1in.pop(tag, None)
+        self.am.pop(tag, None)
+
+
+class RandomPolicy(object):
+    """ Evict a random line, seeded so runs can be repeated """
+
+    def __init__(self, capacity, seed=None):
+        """
+            :param input capacity: number of lines in the cache
+            :param input seed:     seed for the random number generator
+        """
+
+        # own generator so the policy doesn't disturb other randomness
+        self.rng = Random(seed)
+
+        # tags in the cache and where each one sits in the list
+        self.tags = []
+        self.index = {}
+
+    def insert(self, tag):
+        self.index[tag] = len(self.tags)
+        self.tags.append(tag)
+
+    def touch(self, tag):
+        pass
+
+    def victim(self, tag=None):
+        old_tag = self.tags[self.rng.randrange(len(self.tags))]
+        self.remove(old_tag)
+        return old_tag
+
+    def remove(self, tag):
+        if tag not in self.index:
+            return
+
+        # move the last tag into the hole, constant time removal
+        i = self.index.pop(tag)
+        last = self.tags.pop()
+        if last != tag:
+            self.tags[i] = last
+            self.index[last] = i
+
+
+# policies by name, as given to cache(policy=...)
+POLICIES = {
+    'FIFO':   FIFO,
+    'LRU':    LRU,
+    'LFU':    LFU,
+    'ARC':    ARC,
+    '2Q':     TwoQ,
+    'RANDOM': RandomPolicy,
+}
+
+
+def make_policy(name, capacity, seed=None):
+    """
+        Create a replacement policy by name, bogus names give FIFO
+
+        :param input name:     name of the policy, see POLICIES
+        :param input capacity: number of lines in the cache
+        :param input seed:     seed for policies that use randomness
+    """
+    return POLICIES.get(name.upper(), FIFO)(capacity, seed)
@@ -3,35 +3,64 @@
     
     This implementation utilizes NumPy package to automatically
     unpack the data from the csv files provided by the professor
-    into NumPy arrays. To compliment this, the argparse package
+    into NumPy arrays, a chunk at a time (see tracefile.py). To compliment this, the argparse package
     is also used to allow for specifying the csv file names on the
     command line.
 
-    Also the implementation uses the MyHDL package for simulating
-    this event driven system.
+    Also the implementation uses the MyHDL package, or the
+    lightweight heapq based engine in engine.py, for simulating
+    this event driven system. Only now(), delay() and Simulation
+    are needed so either one can be picked on the command line.
 
-    Lastly, the randrange function from the random package is
-    used for randomizing data supplied to the hub since no actual
-    data is specified in the traffic files.
+    Lastly, a seeded NumPy RandomState is used for randomizing data
+    supplied to the hub since no actual data is specified in the
+    traffic files. Cache lines and data center lines hold their words
+    in NumPy uint16 arrays, 2 bytes per word.
+
+    The module can be imported without side effects. simulate()
+    runs one trace through one hierarchy and returns its stats,
+    with all state of the run kept inside the call:
+
+        import sim
+        trace = sim.load_trace('final_project_traffic_1.csv')
+        result = sim.simulate(trace, sim.hierarchy(l1='M1', policy='LRU'))
+        print result.comm_cost, result.cum_latency
 
     Programmed by: William Harrington
     Project Team:  Sixty Percent Club
     ECE485 Final Project
 """
 
-# use MyHDL package, allows for high level modeling with delays
-from myhdl import *
+# use argparse package, parses command line arguments
+import argparse
+
+# sys.modules, for profiling this module
+import sys
 
 # use numpy package, give it alias np
-# used for reading in the CSV files
+# used for the cache line data, every cache has its own seeded generator
 import numpy as np
 
-# use argparse package, parses command line arguments
-import argparse
+# per device queues of the scheduler, lines of the victim buffer
+from collections import deque, OrderedDict
+
+# ready devices of oldest first arbitration
+from heapq import heappush, heappop
 
-# use randrange from random package
-# used for randomizing data
-from random import randrange
+# replacement policies for the caches
+from policies import POLICIES, make_policy
+
+# traffic file reader
+from tracefile import open_trace, load, transactions
+
+# event log, replaces printing what's going on
+from eventlog import LEVELS, SINKS, eventlog, open_log
+
+# disk backed data center for long traces
+from datacenter import datacenter
+
+# latency histograms of the transactions
+from metrics import metrics, histogram
 
 # import isfile function to make sure 
 # the csv file provided exists
@@ -52,21 +81,277 @@ parser.add_argument('-f',
                     help='filename'
                     )
 
-# parse the arguments
-arguments = parser.parse_args()
+# argument for timing model used by the caches
+parser.add_argument('-t', '--timing',
+                    action='store',
+                    dest='timing',
+                    choices=['phase', 'bit'],
+                    default='phase',
+                    help='timing model: one delay per transfer phase '
+                         '(phase) or the per-bit reference model (bit)'
+                    )
+
+# argument for keeping data in the cache lines
+parser.add_argument('--no-payload',
+                    action='store_false',
+                    dest='payload',
+                    help='cache lines only keep their tag, size and state, '
+                         'no random data (faster, uses phase timing)'
+                    )
+
+# arguments for keeping the data center on disk
+parser.add_argument('--dc-memory',
+                    action='store',
+                    dest='dc_memory',
+                    type=int,
+                    help='keep the data center on disk, with at most this '
+                         'many MB of lines in memory'
+                    )
+parser.add_argument('--dc-file',
+                    action='store',
+                    dest='dc_file',
+                    help='file for the data center on disk, a temporary '
+                         'file if not given'
+                    )
+
+# argument for a non-blocking hub
+parser.add_argument('--mshrs',
+                    action='store',
+                    dest='mshrs',
+                    type=int,
+                    default=0,
+                    help='outstanding read misses per cache level, the hub '
+                         'keeps going meanwhile (0 blocks on every miss)'
+                    )
+
+# argument for releasing transactions at their trace time
+parser.add_argument('--arrivals',
+                    action='store',
+                    dest='time_scale',
+                    type=int,
+                    nargs='?',
+                    const=1,
+                    help='release transactions at their trace time, '
+                         'optionally clock cycles per unit of trace time '
+                         '(default 1), instead of back to back'
+                    )
+
+parser.add_argument('--arbitration',
+                    action='store',
+                    dest='arbitration',
+                    choices=['oldest', 'round-robin'],
+                    default='oldest',
+                    help='with --arrivals, serve the oldest transaction '
+                         'first or the devices round robin'
+                    )
+
+# arguments for a banked L2
+parser.add_argument('--banked',
+                    action='store_true',
+                    dest='banked',
+                    help='model the 10 M3 memories of L2 as banks that '
+                         'work at the same time'
+                    )
+parser.add_argument('--interleave',
+                    action='store',
+                    dest='interleave',
+                    choices=['hash', 'modulo', 'xor'],
+                    default='modulo',
+                    help='which bank a tag goes to'
+                    )
+
+# argument for when writes go to the data center
+parser.add_argument('-w', '--write-policy',
+                    action='store',
+                    dest='write_policy',
+                    choices=['write-back', 'write-through', 'write-around'],
+                    default='write-back',
+                    help='send modified lines to the data center when '
+                         'evicted, on every write, or on every write '
+                         'without caching write misses'
+                    )
+
+# argument for putting lines from the data center in the cache
+parser.add_argument('--read-allocate',
+                    action='store_true',
+                    dest='read_allocate',
+                    help='keep the line of a read miss in the cache, '
+                         'so reading it again hits'
+                    )
+
+# arguments for keeping evicted lines in the hub
+parser.add_argument('--victim',
+                    action='store',
+                    dest='victim',
+                    type=int,
+                    default=0,
+                    help='lines of a victim buffer catching lines evicted '
+                         'from L1 and L2'
+                    )
+parser.add_argument('--exclusive',
+                    action='store_true',
+                    dest='exclusive',
+                    help='L1 evictions move to free L2 lines and read '
+                         'misses are served by the other level'
+                    )
+
+# argument for the eviction policy of the caches
+parser.add_argument('-p', '--policy',
+                    action='store',
+                    dest='policy',
+                    choices=sorted(POLICIES),
+                    default='FIFO',
+                    help='eviction policy of both caches'
+                    )
 
-# use numpy to load data from csv file
-if not isfile(join(arguments.fname)):
-    print 'ERROR: %s does NOT exist' % arguments.fname
-    exit(1)
-columns = np.loadtxt(arguments.fname, dtype=int, delimiter=',', unpack=True)
+# arguments for the eviction policy of each cache level
+# these take precedence over -p
+parser.add_argument('--l1-policy',
+                    action='store',
+                    dest='l1_policy',
+                    choices=sorted(POLICIES),
+                    help='eviction policy of L1'
+                    )
+parser.add_argument('--l2-policy',
+                    action='store',
+                    dest='l2_policy',
+                    choices=sorted(POLICIES),
+                    help='eviction policy of L2'
+                    )
 
-# put data from csv file into arrays
-t = columns[0]       # time
-device = columns[1]  # device ID
-op = columns[2]      # operation type
-ts = columns[3]      # transaction size
-tag = columns[4]     # tag
+# argument for the seed of the random data and RANDOM eviction policy
+parser.add_argument('-s', '--seed',
+                    action='store',
+                    dest='seed',
+                    type=int,
+                    default=0,
+                    help='seed for the random data and the RANDOM '
+                         'eviction policy'
+                    )
+
+# arguments for how the hub runs through the events
+# default is pausing before every event
+mode = parser.add_mutually_exclusive_group()
+mode.add_argument('-b', '--batch',
+                  action='store_const',
+                  dest='mode',
+                  const='batch',
+                  default='interactive',
+                  help='run all events without any prompts'
+                  )
+mode.add_argument('--step',
+                  action='store_const',
+                  dest='mode',
+                  const='step',
+                  help='only pause at the breakpoints given with '
+                       '--break-tag, --break-device and --break-time'
+                  )
+
+# arguments for the breakpoints of step mode
+parser.add_argument('--break-tag',
+                    action='append',
+                    dest='break_tags',
+                    type=int,
+                    default=[],
+                    help='pause at transactions with this tag'
+                    )
+parser.add_argument('--break-device',
+                    action='append',
+                    dest='break_devices',
+                    type=int,
+                    default=[],
+                    help='pause at transactions from this device'
+                    )
+parser.add_argument('--break-time',
+                    action='store',
+                    dest='break_time',
+                    type=int,
+                    help='pause once the simulation reaches this time '
+                         '(clock cycles)'
+                    )
+
+# arguments for the event log
+parser.add_argument('-l', '--log-level',
+                    action='store',
+                    dest='log_level',
+                    choices=['summary', 'transaction', 'word'],
+                    default='word',
+                    help='how much to log: only the final stats (summary), '
+                         'every transaction, or every word on the databus'
+                    )
+parser.add_argument('--log-file',
+                    action='store',
+                    dest='log_file',
+                    help='write the event log to this file instead of stdout'
+                    )
+parser.add_argument('--log-format',
+                    action='store',
+                    dest='log_format',
+                    choices=sorted(SINKS),
+                    default='text',
+                    help='format of the event log'
+                    )
+
+# argument for the simulation engine
+parser.add_argument('-e', '--engine',
+                    action='store',
+                    dest='engine',
+                    choices=['event', 'myhdl'],
+                    default='event',
+                    help='simulation engine: heapq event queue (event) '
+                         'or MyHDL (myhdl)'
+                    )
+
+# arguments for profiling the simulation itself
+parser.add_argument('--profile',
+                    action='store_true',
+                    dest='profile',
+                    help='show where the wall time of the simulation goes'
+                    )
+parser.add_argument('--profile-file',
+                    action='store',
+                    dest='profile_file',
+                    help='with --profile, write collapsed stacks for a '
+                         'flame graph to this file'
+                    )
+
+# arguments for exporting the latency histograms
+parser.add_argument('--metrics',
+                    action='store',
+                    dest='metrics',
+                    help='write the latency histograms to this file'
+                    )
+parser.add_argument('--metrics-format',
+                    action='store',
+                    dest='metrics_format',
+                    choices=['csv', 'json', 'prometheus'],
+                    help='format of the latency histograms, by default '
+                         'json if the file ends in .json, prometheus if '
+                         'it ends in .prom, else csv'
+                    )
+
+
+def use_engine(name):
+    """
+        Pick the simulation engine, both provide now(), delay()
+        and Simulation. MyHDL is only imported when it is asked for.
+
+        :param input name: 'event' for engine.py, 'myhdl' for MyHDL
+    """
+    global Simulation, now, delay
+
+    if name == 'myhdl':
+
+        # use MyHDL package, allows for high level modeling with delays
+        from myhdl import Simulation, now, delay
+
+    else:
+
+        # use the event engine, same protocol without MyHDL
+        from engine import Simulation, now, delay
+
+# event engine unless told otherwise
+use_engine('event')
 
 
 """ cache size options """
@@ -96,6 +381,25 @@ M2_latency = 8
 M3_latency = 15
 
 
+""" memory options by name, (cache lines, latency) """
+MEMORIES = {
+    'M1':  (M1, M1_latency),
+    'M20': (M20, M2_latency),
+    'M21': (M21, M2_latency),
+    'M30': (M30, M3_latency),
+    'M31': (M31, M3_latency),
+    'M32': (M32, M3_latency),
+}
+
+
+""" clock """
+
+# seconds per clock cycle, a 100 MHz clock: that is what the
+# bandwidth delays below come from (1/1200 s per satellite bit is
+# 83,333 cycles, 1/5.5e6 s per local bit is 18 cycles)
+CYCLE = 1e-8
+
+
 """ bandwidth delays (in clock cycles) """
 
 # delay for local bit-serial link
@@ -113,35 +417,253 @@ bandwidth_delay_local = 18
 # with the satellite, giving us 83,4333 clock cylces
 bandwidth_delay_satellite = 83433
 
+# the data center answers a request for a tag it doesn't
+# have with a not found reply the size of the request command
+not_found_bits = 32
+
+
+def word_bits(line):
+    """
+        Number of bits the timing model charges for every word
+
+        Each word is charged 4 bits per hex digit, so 0x7 is 4 bits
+        and 0xbeef is 16 bits. Returns an array, one entry per word.
+
+        :param input line: uint16 array of words in the cache line
+    """
+
+    # one hex digit, plus one for every power of 16 a word reaches
+    digits = 1 + (line >= 0x10).astype(np.int64) + (line >= 0x100) + (line >= 0x1000)
+    return 4*digits
+
+
+def line_bits(line):
+    """
+        Number of bits the timing model charges for a cache line
+
+        The same bits per word as the per-bit model charges word by
+        word, so the closed form timing adds up to the same number of
+        clock cycles.
+
+        :param input line: uint16 array of words in the cache line
+    """
+    return int(word_bits(line).sum())
+
+
+def size_bits(words):
+    """
+        Number of bits the timing model charges for a cache line
+        without payload, every word is a full 16 bits
+
+        Payload lines are charged by hex digits (line_bits), so words
+        with leading zeros cost a little less there. Runs with and
+        without payload come out slightly different because of that.
+
+        :param input words: number of words in the cache line
+    """
+    return 16*words
+
+
+""" interleaving functions, which of the banks a tag goes to """
+INTERLEAVE = {
+    # consecutive tags in consecutive banks
+    'modulo': lambda tag, banks: tag % banks,
+
+    # xor of the low tag bits with higher ones, breaks up strides
+    'xor':    lambda tag, banks: (tag ^ (tag >> 4) ^ (tag >> 8)) % banks,
+
+    # multiplicative hash, spreads any pattern
+    'hash':   lambda tag, banks: ((tag*2654435761) & 0xffffffff) % banks,
+}
+
+
+class satellite:
+    """ The satellite link, shared by the levels of a hierarchy """
+
+    def __init__(self):
+        # time the link is done with the transfers booked on it
+        self.busy_until = 0
+
+        # clock cycles the link was used, for its utilization
+        self.busy = 0
+
+    def reserve(self, t, duration):
+        """
+            Book the link, transfers go over it one after the other
+
+            Returns how long to wait before the link is free
+
+            :param input t: time the transfer wants to start
+            :param input duration: clock cycles the link is used
+        """
+        start = max(t, self.busy_until)
+        self.busy_until = start + duration
+        self.busy += duration
+        return start - t
+
+
+class victimbuffer:
+    """ Small fully associative buffer catching lines evicted from the caches """
+
+    def __init__(self, capacity, latency=M1_latency):
+        """
+            :param input capacity: number of lines it holds
+            :param input latency: memory latency in clock cycles
+        """
+        self.capacity = capacity
+        self.latency = latency
+
+        # tag -> (line, dirty), oldest first
+        # a line that is found is taken out, so this is LRU too
+        self.lines = OrderedDict()
+
+        # lines put in and lines found again
+        self.insertions = 0
+        self.hits = 0
+
+    def __contains__(self, tag):
+        return tag in self.lines
+
+    def put(self, tag, line, dirty):
+        """
+            Keep an evicted line
 
-""" Data center """
+            Returns (tag, line, dirty) of the oldest line if the buffer
+            was full, it has to go to the data center, else None
 
-# holds data in the data center
-# aka "Main memory"
-data_center = {}
+            :param input tag: tag of the line
+            :param input line: the line, words or number of words
+            :param input dirty: the data center doesn't have this data
+        """
+        self.insertions += 1
+        self.lines[tag] = (line, dirty)
+        if len(self.lines) > self.capacity:
+            old, (line, dirty) = self.lines.popitem(last=False)
+            return old, line, dirty
+        return None
+
+    def take(self, tag):
+        """
+            Take a line out, returns (line, dirty)
+
+            :param input tag: tag of the line
+        """
+        return self.lines.pop(tag)
 
 
 class cache:
     """ High level model of cache for hub """
 
-    def __init__(self, max_capacity=M1, latency=M1_latency, policy='FIFO'):
+    def __init__(self, max_capacity=M1, latency=M1_latency, policy='FIFO',
+                 timing='phase', seed=None, data_center=None, log=None,
+                 payload=True, mshrs=0, link=None, banks=None,
+                 interleave='modulo', write_policy='write-back',
+                 read_allocate=False, victim=None, name='cache'):
         """
             Initialization, defaults to M1 capacity & latency
-            with a FIFO eviction policy.
+            with a FIFO eviction policy and closed form timing.
 
             Can be easily modified by specifying the following
             arguments when instantiation occurs
 
             :param input max_capacity: maximum capacity of the cache
             :param input latency: latency of memory in clock cycles
-            :param input policy: eviction policy
+            :param input policy: eviction policy, any name in
+                                 policies.POLICIES (FIFO, LRU, LFU,
+                                 ARC, 2Q, RANDOM)
+            :param input timing: 'phase' charges one delay per transfer
+                                 phase, 'bit' yields a delay for every
+                                 bit/word (reference model)
+            :param input seed: seed for the random data and the
+                               RANDOM eviction policy
+            :param input data_center: dict (or datacenter) that holds
+                                      data in the data center, shared
+                                      by the levels of a hierarchy.
+                                      Evicted lines are handed over,
+                                      not copied
+            :param input log: event log, defaults to summary level
+            :param input payload: keep random data in the cache lines,
+                                  if False a line is only its number of
+                                  words and timing comes from that
+                                  (always closed form)
+            :param input mshrs: number of read misses that can be
+                                outstanding (miss status holding
+                                registers), 0 blocks on every miss
+            :param input link: satellite link, shared by the levels of
+                               a hierarchy
+            :param input banks: None for one memory, or the number of
+                                banks the lines are split over. Every
+                                bank has its own lines, policy and busy
+                                time, writes into a bank are posted so
+                                the hub can go on meanwhile
+            :param input interleave: bank of a tag, a name in INTERLEAVE
+                                     or a function (tag, banks) -> bank
+            :param input write_policy: 'write-back' sends modified lines to
+                                       the data center when they are
+                                       evicted, 'write-through' sends
+                                       every write right away and
+                                       'write-around' also doesn't put
+                                       write misses in the cache
+            :param input read_allocate: put the line of a read miss in
+                                        the cache when it arrives
+            :param input victim: victimbuffer catching evicted lines,
+                                 may be shared with the other level
+            :param input name: what the cache is called, like 'L1'
         """
 
-        # internal memory
+        # what it is called
+        self.name = name
+
+        # internal memory, tag -> uint16 array of words
+        # or tag -> number of words without payload
         self.m = {}
 
-        # tags array used for tracking FIFO
-        self.tags = []
+        # lines carry data or only their size
+        self.payload = payload
+
+        # when writes go to the data center
+        # tags of lines that are newer than the data center's copy
+        self.write_policy = write_policy
+        self.dirty = set()
+
+        # read misses fill the cache too
+        self.read_allocate = read_allocate
+
+        # evicted lines go here before the data center
+        self.victim = victim
+
+        # exclusive hierarchy, set by hierarchy.build()
+        # peer is the other level, a read miss there is served by it
+        # lower is the level evicted lines move to when it has room
+        self.peer = None
+        self.lower = None
+
+        # data center aka "Main memory", where evicted lines go
+        if data_center is None:
+            data_center = {}
+        self.data_center = data_center
+
+        # random data for the cache lines
+        self.rng = np.random.RandomState(seed)
+
+        # satellite link to the data center
+        if link is None:
+            link = satellite()
+        self.link = link
+
+        # miss status holding registers
+        # tag -> time its outstanding read miss is done
+        self.mshrs = mshrs
+        self.inflight = {}
+
+        # time the last access is done for the device, later than
+        # when access() returns if the miss is still outstanding
+        self.done_at = 0
+
+        # tells us what's going on
+        if log is None:
+            log = eventlog()
+        self.log = log
 
         # hit flag, indicates read/write hit or miss
         self.hit = False
@@ -166,21 +688,99 @@ class cache:
         self.misses = 0      # misses
         self.comm_cost = 0   # communication cost
         self.cum_latency = 0 # cumulative latency
-        
-        # eviction policy
-        if policy == 'FIFO':
-            # first in first out
-            self.FIFO = True
-            self.LRU = False
-        elif policy == 'LRU':
-            # least recently used
-            self.FIFO = False
-            self.LRU = True
-        else:
-            # this just catches bogus init arguments
-            # and makes the policy FIFO
-            self.FIFO = True
-            self.LRU = False
+        self.merged = 0      # read misses merged with an outstanding one
+        self.wait_latency = 0 # latency spent waiting for MSHRs or the link
+        self.hol_blocking = 0 # time the hub was held up by satellite transfers
+        self.writebacks = 0   # lines sent to the data center
+        self.clean_evictions = 0 # evicted lines the data center had already
+        self.saved_bytes = 0  # bytes of those lines
+        self.saved_cost = 0   # what sending them would have cost
+        self.read_fills = 0   # read misses put in the cache
+        self.not_found = 0    # read misses the data center didn't have
+        self.victim_hits = 0  # read misses found in the victim buffer
+        self.peer_hits = 0    # read misses found in the other level
+        self.demotions = 0    # evicted lines moved to the level below
+
+        # timing model, anything other than 'bit' is closed form
+        # per-bit timing needs the words, so not without payload
+        self.per_bit = (timing == 'bit') and payload
+
+        # banks of the memory, a tag always goes to the same bank
+        self.banked = banks is not None
+        self.banks = banks or 1
+
+        # lines of every bank, the first ones get the lines left over
+        # when they don't split evenly
+        if max_capacity < self.banks:
+            raise ValueError('%s lines can not fill %s banks' % (max_capacity, self.banks))
+        share, extra = divmod(max_capacity, self.banks)
+        self.bank_capacity = [share + (b < extra) for b in range(self.banks)]
+        if not callable(interleave):
+            interleave = INTERLEAVE[interleave]
+        self.interleave = interleave
+
+        # lines in every bank and when every bank is done with
+        # what it is doing, in clock cycles
+        self.bank_used = [0]*self.banks
+        self.bank_busy_until = [0]*self.banks
+
+        # lines of every bank held for read misses still on their way
+        self.bank_reserved = [0]*self.banks
+
+        # bank statistics
+        self.bank_accesses = [0]*self.banks   # accesses
+        self.bank_conflicts = [0]*self.banks  # accesses that found it busy
+        self.bank_wait = [0]*self.banks       # cycles waited for it
+        self.bank_busy = [0]*self.banks       # cycles it was busy
+
+        # eviction policy, keeps track of which line to evict
+        # every bank picks its own victims, with its own seed so
+        # random banks don't all evict the same way
+        # bogus init arguments just give FIFO
+        self.policies = [make_policy(policy, self.bank_capacity[b],
+                                     seed if seed is None else seed + b)
+                         for b in range(self.banks)]
+
+    def words(self, line):
+        """
+            Number of words in a cache line
+
+            :param input line: cache line, words or number of words
+        """
+        if self.payload:
+            return len(line)
+        return line
+
+    def bits(self, line):
+        """
+            Number of bits the timing model charges for a cache line
+
+            :param input line: cache line, words or number of words
+        """
+        if self.payload:
+            return line_bits(line)
+        return size_bits(line)
+
+    def bank(self, tag):
+        """
+            Bank a tag goes to
+
+            :param input tag: tag
+        """
+        if self.banks == 1:
+            return 0
+        return self.interleave(tag, self.banks)
+
+    def occupy(self, bank, cycles):
+        """
+            Keep a bank busy, from now or from when it is free
+
+            :param input bank: bank number
+            :param input cycles: clock cycles it is busy for
+        """
+        if self.banked:
+            self.bank_busy[bank] += cycles
+            self.bank_busy_until[bank] = max(self.bank_busy_until[bank], now()) + cycles
 
     def checkCapacity(self):
         """
@@ -196,6 +796,59 @@ class cache:
             # used doesn't exceed capacity, unset full flag
             self.full = False
 
+    def check(self):
+        """
+            Make sure the lines counted as used are the lines in the
+            cache plus the ones held for read misses on their way
+
+            Raises a RuntimeError if they aren't
+        """
+        lines = [0]*self.banks
+        for tag in self.m:
+            lines[self.bank(tag)] += 1
+        for bank in range(self.banks):
+            if self.bank_used[bank] != lines[bank] + self.bank_reserved[bank]:
+                raise RuntimeError('%s bank %s: %s lines used, %s in the cache '
+                                   'and %s held' % (self.name, bank,
+                                                    self.bank_used[bank], lines[bank],
+                                                    self.bank_reserved[bank]))
+        if self.used != sum(self.bank_used):
+            raise RuntimeError('%s: %s lines used, %s in the banks' % (
+                self.name, self.used, sum(self.bank_used)))
+
+    def makeRoom(self, tag):
+        """
+            Evict a cache line if there is no room for a new one
+
+            :param input tag: tag about to be put in the cache
+        """
+
+        # check capacity of cache
+        self.checkCapacity()
+
+        # the bank the tag goes to
+        bank = self.bank(tag)
+
+        # every line of the bank is held for a read miss on its way,
+        # nothing to evict until one of them is in
+        while self.bank_used[bank] + 1 > self.bank_capacity[bank] and \
+                self.bank_used[bank] == self.bank_reserved[bank]:
+            waited = now()
+            yield delay(max(min(self.inflight.values()) - now(), 0))
+            self.wait_latency += (now()-waited)*CYCLE
+            self.hol_blocking += (now()-waited)*CYCLE
+
+        # check the bank is full, with one bank that is the full flag
+        # also make sure new cache line + used < capacity to
+        # prevent the cache from being over filled
+        # and evict if new cache line + used > capacity
+        if self.bank_used[bank] + 1 > self.bank_capacity[bank]:
+
+            # eviction is needed, let the policy pick the line
+            # and let eviction function take over
+            # resume execution here when done
+            yield self.evict(self.policies[bank].victim(tag))
+
     def access(self, w, tag, ts):
         """
             Access the memory
@@ -208,15 +861,29 @@ class cache:
         # keep track of when transaction started
         start = now()
 
+        # the bank the tag goes to
+        bank = self.bank(tag)
+
+        # banked memory, wait for the bank if it is still busy
+        if self.banked:
+            self.bank_accesses[bank] += 1
+            wait = self.bank_busy_until[bank] - now()
+            if wait > 0:
+                self.bank_conflicts[bank] += 1
+                self.bank_wait[bank] += wait
+                yield delay(wait)
+
         # delay due to memory latency
+        self.occupy(bank, self.latency)
         yield delay(self.latency)
 
-        # convert tag to hex
-        tag = hex(tag)
-
         # write
         if w:
 
+            # a copy in the other level or the victim buffer is stale now
+            if tag not in self.m:
+                self.invalidate(tag)
+
             # check to see if tag in memory
             if tag in self.m:
 
@@ -225,54 +892,33 @@ class cache:
                 self.hit = True
                 self.hits += 1
 
-                # check capacity of cache
-                self.checkCapacity()
-
-                # check for full flag, if set, evict
-                # also make sure new cache line + used < max_capacity to
-                # prevent the cache from being over filled
-                # and evict if new cache line + used > max_capacity
-                if self.full or (self.used+1 > self.max_capacity):
-
-                    # eviction is needed, check policy
-                    if self.LRU:
-
-                        # least recently used
-                        old_key = min(self.m.keys(), key=lambda k:self.m[k])
-
-                        # let eviction function take over
-                        # resume execution here when done
-                        yield self.evict(old_key)
-
-                    elif self.FIFO:
-
-                        # first in first out
-                        # let eviction function take over
-                        # resume execution here when done
-                        yield self.evict(self.tags[-1])
+                # line already has its place in the cache, overwrite it
+                # resume execution here when done
+                yield self.fill(tag, ts)
 
-                # initialize cache line
-                self.m[tag] = []
-                
-                # go through the data and grab two bytes
-                # and store in memory
-                # the tag and index bits take up two bytes
-                for x in range(ts/2 - 1):
-                    
-                    # wait for 16 bits to be sent
-                    for y in range(16):
+                # line was just used
+                self.policies[bank].touch(tag)
 
-                        # delay due to local link bandwidth
-                        yield delay(bandwidth_delay_local)
+            # write-around, a miss goes straight to the data center
+            elif self.write_policy == 'write-around':
 
-                    # make word random 4 digit hex value
-                    self.m[tag].append(hex(randrange(2**16-1)))
+                # tag not in memory
+                # unset hit flag, increment misses
+                self.hit = False
+                self.misses += 1
 
-                    # delay due to memory latency
-                    yield delay(self.latency)
+                # receive the data from the device and pass it on
+                # resume execution here when done
+                line = self.new_line(ts)
+                yield self.receive(ts)
+                if self.log.transactions:
+                    self.log.write(now(), 'write_through', hex(tag))
+                yield self.writeback(tag, line)
 
-                # update used
-                self.used += 1
+                # nothing in the cache to keep track of
+                self.cum_latency += (now()-start)*CYCLE
+                self.done_at = now()
+                return
 
             else:
 
@@ -281,58 +927,39 @@ class cache:
                 self.hit = False
                 self.misses += 1
 
-                # check capacity of cache
-                self.checkCapacity()
-
-                # check for full flag, if set, evict
-                # also make sure new cache line + used < max_capacity to
-                # prevent the cache from being over filled
-                # and evict if new cache line + used > max_capacity
-                if self.full or (self.used + 1 > self.max_capacity):
-
-                    # eviction is needed, check policy
-                    if self.LRU:
-
-                        # least recently used
-                        old_key = min(self.m.keys(), key=lambda k:self.m[k])
+                # evict if the cache is full
+                # resume execution here when done
+                yield self.makeRoom(tag)
 
-                        # let eviction function take over
-                        # resume execution here when done
-                        yield self.evict(old_key)
+                # an outstanding read miss on the tag may have put its
+                # line in while making room, then the write overwrites it
+                allocate = tag not in self.m
 
-                    elif self.FIFO:
+                # receive the cache line from the device
+                # resume execution here when done
+                yield self.fill(tag, ts)
 
-                        # first in first out
-                        # let eviction function take over
-                        # resume execution here when done
-                        yield self.evict(self.tags[-1])
+                # new line for the policy to keep track of
+                if allocate:
+                    self.policies[bank].insert(tag)
 
-                if self.FIFO:
-                    # insert tag into beginning of tags array
-                    self.tags.insert(0, tag)
+                    # update used
+                    self.used += 1
+                    self.bank_used[bank] += 1
 
-                # initialize cache line
-                self.m[tag] = []
+                # line was just used
+                else:
+                    self.policies[bank].touch(tag)
 
-                # go through the data and grab two bytes
-                # and store in memory
-                # the tag and index bits take up two bytes
-                for x in range(ts/2 - 1):
+            # write-back, the line is newer than the data center's
+            if self.write_policy == 'write-back':
+                self.dirty.add(tag)
 
-                    # wait for 16 bits to be sent
-                    for y in range(16):
-
-                        # delay due to local link bandwidth
-                        yield delay(bandwidth_delay_local)
-
-                    # make word random 4 digit hex value
-                    self.m[tag].append(hex(randrange(2**16-1)))
-
-                    # delay due to memory latency
-                    yield delay(self.latency)
-
-                # update used
-                self.used += 1
+            # the others send it to the data center right away
+            else:
+                if self.log.transactions:
+                    self.log.write(now(), 'write_through', hex(tag))
+                yield self.writeback(tag, self.m[tag])
 
         # read
         else:
@@ -345,27 +972,26 @@ class cache:
                 self.hit = True
                 self.hits += 1
 
-                # nice print out to tell us what's going on
-                print '%s: Read request hit, receiving bytes from memory' % now()
-
-                # counter for counting the words
-                counter = 0
-
-                # go through data in cache line
-                for bits in self.m[tag]:
+                # line was just used
+                self.policies[bank].touch(tag)
 
-                    # bandwidth delay for local link
-                    # and memory latency
-                    yield delay(4*(len(bits)-2)*self.latency*bandwidth_delay_local)
+                # nice print out to tell us what's going on
+                if self.log.transactions:
+                    self.log.write(now(), 'read_hit')
 
-                    # output to databus
-                    self.databus = bits
+                # bank is busy reading the line out
+                self.occupy(bank, self.bits(self.m[tag])*self.latency*bandwidth_delay_local)
 
-                    # nice print out to tell us what's going on
-                    print '%s: Word %s = %s' % (now(), counter, self.databus)                  
+                # banks work at the same time, this one reads the line
+                # out to the device while the hub goes on, only another
+                # access to the same bank has to wait for it
+                if self.banked:
+                    self.done_at = self.bank_busy_until[bank]
+                    yield self.readout(self.m[tag], start), delay(0)
+                    return
 
-                    # increment counter
-                    counter += 1
+                # resume execution here when the line is read out
+                yield self.readout(self.m[tag])
 
             else:
 
@@ -378,153 +1004,919 @@ class cache:
                 # until we get it from the data center
                 self.databus = []
 
-                # keep track of when transactions started
-                started = now()
-
                 # nice print out to tell us what's up
-                print '%s: Read request miss, contacting data center...' % now()
-                
-                # contact data center, send command via satellite
+                if self.log.transactions:
+                    self.log.write(now(), 'read_miss')
+
+                # the other level or the victim buffer may have it,
+                # no need for the satellite then
+                if self.peer is not None and tag in self.peer.m:
+                    self.peer_hits += 1
+                    if self.log.transactions:
+                        self.log.write(now(), 'peer_hit', hex(tag))
+                    latency = self.peer.latency
+                    line, dirty = self.peer.release(tag)
+                    yield self.local(tag, line, dirty, latency, start)
+                    return
+                if self.victim is not None and tag in self.victim:
+                    self.victim_hits += 1
+                    self.victim.hits += 1
+                    if self.log.transactions:
+                        self.log.write(now(), 'victim_hit', hex(tag))
+                    line, dirty = self.victim.take(tag)
+                    yield self.local(tag, line, dirty, self.victim.latency, start)
+                    return
+
+                # a miss on this tag is on its way already, the
+                # request gets the same line when it arrives without
+                # asking the data center again
+                if tag in self.inflight:
+                    self.merged += 1
+                    if self.log.transactions:
+                        self.log.write(now(), 'merged', hex(tag))
+                    self.done_at = self.inflight[tag]
+                    yield self.merge(start, self.done_at), delay(0)
+                    return
+
+                # line comes from the data center
+                # None if it doesn't have it, it answers not found
+                if tag in self.data_center:
+                    line = self.data_center[tag]
+                else:
+                    line = None
+
+                # all MSHRs taken, the hub waits for the first one
+                # to be done, head-of-line blocking
+                if self.mshrs:
+                    while len(self.inflight) >= self.mshrs:
+                        waited = now()
+                        yield delay(max(min(self.inflight.values()) - now(), 0))
+                        self.wait_latency += (now()-waited)*CYCLE
+                        self.hol_blocking += (now()-waited)*CYCLE
+
+                # read-allocate, make room now so the line has a place
+                # when it arrives, unless every line of the bank is
+                # already held for other read misses
+                allocate = False
+                if self.read_allocate and line is not None and \
+                        (self.bank_used[bank] < self.bank_capacity[bank] or
+                         self.bank_used[bank] > self.bank_reserved[bank]):
+                    yield self.makeRoom(tag)
+
+                    # hold the line
+                    self.used += 1
+                    self.bank_used[bank] += 1
+                    self.bank_reserved[bank] += 1
+                    allocate = True
+
+                # book the satellite link for the whole transfer
+                if line is None:
+                    bits = not_found_bits
+                else:
+                    bits = self.bits(line)
+                busy = 64*bandwidth_delay_satellite + 100 + bits*(2*bandwidth_delay_satellite + 100)
+                wait = self.link.reserve(now(), busy)
+
+                if self.mshrs:
+
+                    # hold an MSHR until the line is at the device
+                    # the hub goes on with the next transaction
+                    self.inflight[tag] = now() + wait + busy + bits*bandwidth_delay_local
+                    self.done_at = self.inflight[tag]
+                    yield self.fetch(tag, line, start, wait, allocate), delay(0)
+
+                else:
+
+                    # blocking, the hub waits for the data center
+                    waited = now()
+                    yield self.fetch(tag, line, start, wait, allocate)
+                    self.hol_blocking += (now()-waited)*CYCLE
+                    self.done_at = now()
+
+                # fetch() keeps track of the latency
+                return
+
+        # memory access done, add to cumulative latency, convert to seconds
+        # because who really thinks about this in clock cycles?
+        self.cum_latency += (now()-start)*CYCLE
+        self.done_at = now()
+
+    def readout(self, line, start=None):
+        """
+            Read a line out of the memory to the device, for a read hit
+
+            :param input line: the cache line
+            :param input start: time the access started, given when the
+                                hub didn't wait for the read out, which
+                                then adds the latency itself
+        """
+
+        # closed form timing, whole line in one delay
+        if not self.per_bit:
+
+            # bandwidth delay for local link
+            # and memory latency
+            yield delay(self.bits(line)*self.latency*bandwidth_delay_local)
+
+        # no words to put on the databus without payload
+        if not self.payload:
+            self.databus = []
+
+        # go word by word for per-bit timing or to log the words
+        elif self.per_bit or self.log.words:
+
+            # counter for counting the words
+            counter = 0
+
+            # go through data in cache line
+            for word, bits in zip(line.tolist(), word_bits(line).tolist()):
+
+                # per-bit reference timing, one delay per word
+                if self.per_bit:
+
+                    # bandwidth delay for local link
+                    # and memory latency
+                    yield delay(bits*self.latency*bandwidth_delay_local)
+
+                # output to databus
+                self.databus = word
+
+                # nice print out to tell us what's going on
+                if self.log.words:
+                    self.log.write(now(), 'word', counter, hex(word))
+
+                # increment counter
+                counter += 1
+
+        # whole line went over the databus, last word is left on it
+        elif len(line):
+            self.databus = int(line[-1])
+
+        # memory access done, add to cumulative latency
+        if start is not None:
+            self.cum_latency += (now()-start)*CYCLE
+
+    def fetch(self, tag, line, start, wait, allocate=False):
+        """
+            Get a line from the data center over the satellite link
+            and pass it on to the device, for a read miss
+
+            :param input tag: tag in data center
+            :param input line: the line in the data center, None if
+                               it doesn't have the tag
+            :param input start: time the access started
+            :param input wait: clock cycles until the link is free
+            :param input allocate: a line of the cache is held for it
+        """
+
+        # the link is busy with other transfers
+        if wait:
+            yield delay(wait)
+            self.wait_latency += wait*CYCLE
+
+        # keep track of when the transfer started
+        started = now()
+
+        # contact data center, send command via satellite
+
+        # delay for hub to satellite
+        yield delay(32*bandwidth_delay_satellite)
+
+        # delay for satellite to data center
+        yield delay(32*bandwidth_delay_satellite+100)
 
-                # delay for hub to satellite
-                yield delay(32*bandwidth_delay_satellite)
+        # data center doesn't have it, only a not found reply comes back
+        if line is None:
 
-                # delay for satellite to data center
-                yield delay(32*bandwidth_delay_satellite+100)
+            # data center to satellite delay
+            yield delay(not_found_bits*(bandwidth_delay_satellite+100))
+
+            # satellite to hub delay
+            yield delay(not_found_bits*bandwidth_delay_satellite)
+
+            # hub to device delay
+            yield delay(not_found_bits*bandwidth_delay_local)
+
+            self.not_found += 1
+
+            # tell the user the tag doesn't exist
+            if self.log.transactions:
+                self.log.write(now(), 'not_found', hex(tag))
+
+        # closed form timing, one delay per transfer phase
+        elif not self.per_bit:
+
+            # bits in the cache line
+            bits = self.bits(line)
+
+            # data center to satellite delay
+            yield delay(bits*(bandwidth_delay_satellite+100))
+
+            # satellite to hub delay
+            yield delay(bits*bandwidth_delay_satellite)
+
+            # hub to device delay
+            yield delay(bits*bandwidth_delay_local)
+
+        # no words to put on the databus without a line or payload
+        if line is None or not self.payload:
+            self.databus = []
+
+        # go word by word for per-bit timing or to log the words
+        elif self.per_bit or self.log.words:
+
+            # for counting the words
+            counter = 0
+            for word, bits in zip(line.tolist(), word_bits(line).tolist()):
+
+                # per-bit reference timing, delays for every word
+                if self.per_bit:
 
-                # for counting the words
-                counter = 0
-                for bits in data_center[tag]:
                     # data center to satellite delay
-                    yield delay(4*(len(bits) - 2)*(bandwidth_delay_satellite+100))
+                    yield delay(bits*(bandwidth_delay_satellite+100))
 
                     # satellite to hub delay
-                    yield delay(4*(len(bits) - 2)*bandwidth_delay_satellite)
-                    
+                    yield delay(bits*bandwidth_delay_satellite)
+
                     # hub to device delay
-                    yield delay(4*(len(bits) - 2)*bandwidth_delay_local)
+                    yield delay(bits*bandwidth_delay_local)
+
+                # output to databus
+                self.databus = word
 
-                    # output to databus
-                    self.databus = bits
+                # print statement to tell us what's going on
+                if self.log.words:
+                    self.log.write(now(), 'word', counter, hex(word))
 
-                    # print statement to tell us what's going on
-                    print '%s: Word %s = %s' % (now(), counter, self.databus)
+                # increment counter
+                counter += 1
 
-                    # increment counter
-                    counter += 1
+        # whole line went over the databus, last word is left on it
+        elif len(line):
+            self.databus = int(line[-1])
 
-                # change in time from when transaction started to finish
-                finished = now() - started
+        # change in time from when transaction started to finish
+        finished = now() - started
 
-                # awesome print statement to inform user
-                print '%s: Done communicating with data center...time elapsed: %s' % (now(), finished)
+        # awesome print statement to inform user
+        if self.log.transactions:
+            self.log.write(now(), 'dc_done', finished)
 
-                # update communication cost
-                self.comm_cost += (finished*10e-8)/60
+        # update communication cost
+        self.comm_cost += (finished*CYCLE)/60
 
-        # memory access done, add to cumulative latency, convert to seconds
-        # because who really thinks about this in clock cycles?
-        self.cum_latency += (now()-start)*10e-8
+        # line is at the device, MSHR is free again
+        self.inflight.pop(tag, None)
 
-    def evict(self, tag):
+        # keep it in the line held for it
+        if allocate:
+            self.install(tag, line)
+
+        # memory access done, add to cumulative latency
+        self.cum_latency += (now()-start)*CYCLE
+
+    def install(self, tag, line):
         """
-            Evict cache line
+            Put the line of a read miss in the line held for it
 
-            :param input tag: tag in cache to evict
+            The line is clean, the data center has the same data.
+
+            :param input tag: tag of the line
+            :param input line: the line from the data center
+        """
+        bank = self.bank(tag)
+        self.bank_reserved[bank] -= 1
+
+        # a device wrote the tag while the line was on its way,
+        # that data is newer so the held line isn't needed
+        if tag in self.m or (self.peer is not None and tag in self.peer.m) \
+                or (self.victim is not None and tag in self.victim):
+            self.used -= 1
+            self.bank_used[bank] -= 1
+            return
+
+        # lines are never changed in place, so sharing the
+        # data center's array is fine
+        self.m[tag] = line
+        self.policies[bank].insert(tag)
+        self.read_fills += 1
+
+        # bank is busy writing the line while it goes to the device
+        if self.banked:
+            self.occupy(bank, int(self.words(line)*self.latency))
+
+    def merge(self, start, done):
+        """
+            Read miss on a tag that is already on its way
+
+            :param input start: time the access started
+            :param input done: time the outstanding miss is done
+        """
+
+        # wait for the line to arrive with the outstanding miss
+        yield delay(max(done - now(), 0))
+
+        # memory access done, add to cumulative latency
+        self.cum_latency += (now()-start)*CYCLE
+
+    def new_line(self, ts):
+        """
+            Random data for a cache line from a device
+
+            :param input ts:  transaction size
+        """
+
+        # the tag and index bits take up two bytes
+        # so that leaves ts/2 - 1 words of data
+        words = ts/2 - 1
+
+        # make every word a random 4 digit hex value, all in one go
+        # or just remember the size without payload
+        if self.payload:
+            return self.rng.randint(0, 2**16-1, size=words, dtype=np.uint16)
+        return words
+
+    def receive(self, ts):
+        """
+            Wait for a cache line to come from a device over the local link
+
+            :param input ts:  transaction size
+        """
+
+        # words of data in the transaction
+        words = ts/2 - 1
+
+        # closed form timing, one delay for the whole line
+        if not self.per_bit:
+
+            # device to hub delay, 16 bits per word
+            yield delay(int(words*16*bandwidth_delay_local))
+
+        else:
+
+            # go through the data two bytes at a time
+            for x in range(words):
+
+                # wait for 16 bits to be sent
+                for y in range(16):
+
+                    # delay due to local link bandwidth
+                    yield delay(bandwidth_delay_local)
+
+    def fill(self, tag, ts):
         """
+            Receive a cache line from a device over the local link
+
+            :param input tag: tag in cache
+            :param input ts:  transaction size
+        """
+
+        # words of data in the transaction
+        words = ts/2 - 1
+
+        # the new data
+        self.m[tag] = self.new_line(ts)
+
+        # device to hub
+        yield self.receive(ts)
 
-        # show eviction information
-        print '%s: EVICT %s, contacting data center...' % (now(), tag)
+        # posted write, the bank is busy while the hub goes on
+        if self.banked:
+            self.occupy(self.bank(tag), int(words*self.latency))
 
-        # initialize data center memory line
-        data_center[tag] = []
+        # closed form timing, delay due to memory latency for every word
+        elif not self.per_bit:
+            yield delay(int(words*self.latency))
+
+        else:
+
+            # delay due to memory latency, word by word
+            for x in range(words):
+                yield delay(self.latency)
+
+    def writeback(self, tag, line):
+        """
+            Send a cache line to the data center over the satellite link
+
+            :param input tag: tag of the line
+            :param input line: the line, words or number of words
+        """
+
+        # bits in the cache line
+        bits = self.bits(line)
+
+        # book the satellite link, outstanding misses may be using it
+        # the hub waits, head-of-line blocking
+        wait = self.link.reserve(now(), bits*(2*bandwidth_delay_satellite + 100))
+        if wait:
+            yield delay(wait)
+            self.wait_latency += wait*CYCLE
+            self.hol_blocking += wait*CYCLE
 
         # keep track of when eviction process started
         started = now()
-        
-        # eviction about to happen, write to data center
-        for bits in self.m[tag]:
+
+        # closed form timing, one delay per transfer phase
+        if not self.per_bit:
 
             # hub to satellite delay
-            yield delay(4*(len(bits) - 2)*bandwidth_delay_satellite)
+            yield delay(bits*bandwidth_delay_satellite)
 
             # satellite to data center delay
-            yield delay(4*(len(bits) - 2)*(bandwidth_delay_satellite+100))
+            yield delay(bits*(bandwidth_delay_satellite+100))
+
+        else:
+
+            # write to data center word by word
+            for bits in word_bits(line).tolist():
+
+                # hub to satellite delay
+                yield delay(bits*bandwidth_delay_satellite)
+
+                # satellite to data center delay
+                yield delay(bits*(bandwidth_delay_satellite+100))
 
-            # store in data center
-            data_center[tag].append(bits)
+        # store in data center, lines are never changed in place so
+        # the array (or size without payload) is handed over, not copied
+        self.data_center[tag] = line
 
         # change in time from when transaction started to finish
         finished = now() - started
 
         # is it obvious yet that I like to keep my user informed?
-        print '%s: Done communicating with data center...time elapsed: %s' % (now(), finished)
+        if self.log.transactions:
+            self.log.write(now(), 'dc_done', finished)
 
         # update communication cost
-        self.comm_cost += (finished*10e-8)/60
+        self.comm_cost += (finished*CYCLE)/60
+        self.writebacks += 1
+
+        # hub couldn't do anything else meanwhile
+        self.hol_blocking += finished*CYCLE
+
+    def release(self, tag):
+        """
+            Take a line out of the cache
+
+            Returns (line, dirty)
+
+            :param input tag: tag in cache
+        """
 
         # update used
         self.used -= 1
+        bank = self.bank(tag)
+        self.bank_used[bank] -= 1
 
-        # check for fifo
-        if self.FIFO:
-            # first in first out eviction, evict from tags array & memory
-            self.tags.pop(-1)
+        # policy doesn't need to keep track of it anymore
+        self.policies[bank].remove(tag)
 
         # get rid of cache line
-        self.m.pop(tag)
+        dirty = tag in self.dirty
+        self.dirty.discard(tag)
+        return self.m.pop(tag), dirty
 
+    def place(self, tag, line, dirty):
+        """
+            Put a line from the other level or the victim buffer in the cache
 
-# Level 1 memory module, 1 M2 memory with 4 cache lines of 128 Bytes each
-L1 = cache(max_capacity=M20, latency=M2_latency)
+            :param input tag: tag of the line
+            :param input line: the line, words or number of words
+            :param input dirty: the data center doesn't have this data
+        """
+
+        # evict if the cache is full
+        # resume execution here when done
+        yield self.makeRoom(tag)
+
+        # new line for the policy to keep track of
+        bank = self.bank(tag)
+        self.m[tag] = line
+        self.policies[bank].insert(tag)
+        if dirty:
+            self.dirty.add(tag)
+
+        # update used
+        self.used += 1
+        self.bank_used[bank] += 1
+
+        # write it in the memory, posted if banked
+        words = self.words(line)
+        if self.banked:
+            self.occupy(bank, int(words*self.latency))
+        else:
+            yield delay(int(words*self.latency))
+
+    def invalidate(self, tag):
+        """
+            Drop copies of a line in the other level or the victim buffer
+
+            :param input tag: tag about to be written
+        """
+        if self.peer is not None and tag in self.peer.m:
+            self.peer.release(tag)
+        if self.victim is not None and tag in self.victim:
+            self.victim.take(tag)
+
+    def local(self, tag, line, dirty, latency, start):
+        """
+            Read miss served by the other level or the victim buffer,
+            the line moves to this cache
+
+            :param input tag: tag of the line
+            :param input line: the line, words or number of words
+            :param input dirty: the data center doesn't have this data
+            :param input latency: memory latency where the line was
+            :param input start: time the access started
+        """
+
+        # closed form timing, whole line in one delay
+        if not self.per_bit:
+
+            # bandwidth delay for local link
+            # and memory latency
+            yield delay(self.bits(line)*latency*bandwidth_delay_local)
+
+        # no words to put on the databus without payload
+        if not self.payload:
+            self.databus = []
+
+        # go word by word for per-bit timing or to log the words
+        elif self.per_bit or self.log.words:
+
+            # counter for counting the words
+            counter = 0
+            for word, bits in zip(line.tolist(), word_bits(line).tolist()):
+
+                # per-bit reference timing, one delay per word
+                if self.per_bit:
+                    yield delay(bits*latency*bandwidth_delay_local)
+
+                # output to databus
+                self.databus = word
+
+                # nice print out to tell us what's going on
+                if self.log.words:
+                    self.log.write(now(), 'word', counter, hex(word))
+
+                # increment counter
+                counter += 1
+
+        # whole line went over the databus, last word is left on it
+        elif len(line):
+            self.databus = int(line[-1])
+
+        # device has it, keep it here from now on
+        yield self.place(tag, line, dirty)
+
+        # memory access done, add to cumulative latency
+        self.cum_latency += (now()-start)*CYCLE
+        self.done_at = now()
+
+    def retire(self, tag, line, dirty):
+        """
+            Line leaves the hub, modified lines go to the data center
+
+            :param input tag: tag of the line
+            :param input line: the line, words or number of words
+            :param input dirty: the data center doesn't have this data
+        """
+
+        # modified line, the data center needs the new data
+        if dirty:
+
+            # show eviction information
+            if self.log.transactions:
+                self.log.write(now(), 'evict', hex(tag))
+
+            # send it over the satellite
+            # resume execution here when done
+            yield self.writeback(tag, line)
+
+        else:
 
-# Level 2 memory module, 10 M3 memories each with 1 cache line of 1kB
-L2 = cache(max_capacity=10*M32, latency=M3_latency)
+            # data center has the same data already, just drop it
+            if self.log.transactions:
+                self.log.write(now(), 'drop', hex(tag))
 
+            self.clean_evictions += 1
 
-def hub(mem1, mem2):
+            # what writing it back would have cost, only write-back
+            # saves anything, the others sent every write already
+            if self.write_policy == 'write-back':
+                bits = self.bits(line)
+                self.saved_bytes += 2*self.words(line)
+                self.saved_cost += (bits*(2*bandwidth_delay_satellite + 100)*CYCLE)/60
+
+    def evict(self, tag):
+        """
+            Evict cache line
+
+            :param input tag: tag in cache to evict
+        """
+
+        # take it out of the cache
+        line, dirty = self.release(tag)
+
+        # room in the level below, it stays in the hub
+        lower = self.lower
+        if lower is not None and \
+                lower.bank_used[lower.bank(tag)] < lower.bank_capacity[lower.bank(tag)]:
+            if self.log.transactions:
+                self.log.write(now(), 'demote', hex(tag))
+            self.demotions += 1
+            yield self.lower.place(tag, line, dirty)
+
+        # victim buffer catches it, its oldest line may have to go
+        elif self.victim is not None:
+            if self.log.transactions:
+                self.log.write(now(), 'victim', hex(tag))
+            old = self.victim.put(tag, line, dirty)
+            if old is not None:
+                yield self.retire(*old)
+
+        else:
+            yield self.retire(tag, line, dirty)
+
+
+def pause(message):
+    """
+        Wait for a key press, returns what was typed
+
+        A closed stdin counts as Q, so runs without a terminal
+        don't crash with an EOFError
+
+        :param input message: prompt to show
+    """
+    try:
+        return raw_input(message)
+    except EOFError:
+        return 'Q'
+
+
+class breakpoints:
+    """ Where the hub stops in step mode """
+
+    def __init__(self, tags=(), devices=(), time=None):
+        """
+            :param input tags: stop at transactions with these tags
+            :param input devices: stop at transactions from these devices
+            :param input time: stop once at the first transaction at or
+                               after this simulation time
+        """
+        self.tags = set(tags)
+        self.devices = set(devices)
+        self.time = time
+
+    def hit(self, time, device, tag):
+        """
+            Check a transaction against the breakpoints
+
+            :param input time: current simulation time
+            :param input device: device ID of the transaction
+            :param input tag: tag of the transaction
+        """
+        if tag in self.tags or device in self.devices:
+            return True
+
+        # time breakpoint only stops once
+        if self.time is not None and time >= self.time:
+            self.time = None
+            return True
+
+        return False
+
+
+class scheduler:
+    """
+        Releases transactions at their trace time
+
+        Every device has its own queue. Transactions join their
+        device's queue when the simulation reaches their time (trace
+        time times time_scale, in clock cycles), and the hub serves
+        the queues one transaction at a time, since the local link and
+        memories are shared. When every queue is empty the hub skips
+        straight to the next arrival.
+
+        Arbitration between the devices is either oldest first, which
+        keeps the order of the trace, or round robin, which is fair
+        to every device but can serve a REQUEST before another
+        device's SEND of the same tag.
+    """
+
+    def __init__(self, time_scale=1, arbitration='oldest'):
+        """
+            :param input time_scale: clock cycles per unit of the
+                                     trace time column
+            :param input arbitration: 'oldest' or 'round-robin'
+        """
+        self.time_scale = time_scale
+        self.round_robin = (arbitration == 'round-robin')
+
+        # transactions seen so far, keeps arrivals in trace order
+        self.seq = 0
+
+        # queue of transactions per device
+        self.queues = {}
+
+        # devices with something queued, in round robin order, or a
+        # heap of (seq of the head transaction, device) for oldest first
+        self.ready = deque() if self.round_robin else []
+
+        # next transaction that hasn't arrived yet
+        self.upcoming = None
+
+        # measurements, in clock cycles
+        self.queue_delay = 0  # time spent queued
+        self.busy = 0         # time the hub was serving a transaction
+        self.longest = 0      # most transactions queued at once
+        self.queued = 0       # transactions queued right now
+        self.latency = {}     # device -> histogram of arrival to done
+
+    def next(self, rows, time):
+        """
+            Pick the next transaction to serve
+
+            Returns (wait, row): row is the transaction to serve, or
+            None with the clock cycles until the next arrival, or
+            None with 0 when there are no transactions left
+
+            :param input rows: iterator of transactions
+            :param input time: current simulation time
+        """
+
+        # queue everything that has arrived by now
+        while True:
+            if self.upcoming is None:
+                self.upcoming = next(rows, None)
+                if self.upcoming is None:
+                    break
+            if self.upcoming[0]*self.time_scale > time:
+                break
+            device = self.upcoming[1]
+            queue = self.queues.setdefault(device, deque())
+            if not queue:
+                self.wait_turn(device, self.seq)
+            queue.append((self.seq, self.upcoming))
+            self.seq += 1
+            self.upcoming = None
+            self.queued += 1
+            self.longest = max(self.longest, self.queued)
+
+        # idle, wait for the next arrival
+        if not self.ready:
+            if self.upcoming is None:
+                return 0, None
+            return self.upcoming[0]*self.time_scale - time, None
+
+        # next device in turn
+        if self.round_robin:
+            device = self.ready.popleft()
+
+        # device with the oldest transaction
+        else:
+            device = heappop(self.ready)[1]
+
+        # it waits for its turn again if it has more
+        queue = self.queues[device]
+        seq, row = queue.popleft()
+        if queue:
+            self.wait_turn(device, queue[0][0])
+        self.queued -= 1
+        return 0, row
+
+    def wait_turn(self, device, seq):
+        """
+            Make a device ready to be served
+
+            :param input device: device ID
+            :param input seq: seq of the transaction at the head of
+                              its queue
+        """
+        # to the back of the round
+        if self.round_robin:
+            self.ready.append(device)
+
+        # ordered by its oldest transaction
+        else:
+            heappush(self.ready, (seq, device))
+
+    def record(self, device, arrival, start, end, done):
+        """
+            Keep track of a served transaction
+
+            :param input device: device ID
+            :param input arrival: time the transaction arrived
+            :param input start: time the hub started serving it
+            :param input end: time the hub was done serving it
+            :param input done: time the transaction was done for the
+                               device, after end for outstanding misses
+        """
+        self.queue_delay += start - arrival
+        self.busy += end - start
+
+        # fixed memory however many transactions there are
+        latency = self.latency.get(device)
+        if latency is None:
+            latency = self.latency[device] = histogram()
+        latency.record(done - arrival)
+
+    def percentiles(self):
+        """ device -> (transactions, p50, p95, p99, max) latency in clock cycles """
+        result = {}
+        for device, latency in self.latency.items():
+            p50, p95, p99 = latency.percentiles([0.5, 0.95, 0.99])
+            result[device] = (latency.count, p50, p95, p99, latency.max)
+        return result
+
+
+def hub(mem1, mem2, trace, mode='interactive', breaks=None, sched=None,
+        metrics=None):
     """
         High level modeling of transactions on wireless hub
 
         :param input mem1: Level 1 memory module
         :param input mem2: Level 2 memory module
+        :param input trace: structured array of transactions or an
+                            iterable of chunks, see tracefile.py
+        :param input mode: 'interactive' pauses before every event,
+                           'batch' never pauses, 'step' pauses only
+                           at breaks
+        :param input breaks: breakpoints for step mode
+        :param input sched: scheduler to release transactions at their
+                            trace time, None replays them back to back
+        :param input metrics: latency histograms to record every
+                              transaction in, see metrics.py
     """
 
+    # the hub tells us what's going on through the caches' event log
+    log = mem1.log
+
+    # step mode without breakpoints runs through
+    if breaks is None:
+        breaks = breakpoints()
+
     # wait for key press to continue    
-    try:
-        input("%s: Press enter to start" % now())
+    if mode == 'interactive':
+        log.flush()
+        pause("%s: Press enter to start" % now())
+
+    # Q runs all events without pausing, batch mode never pauses
+    key = 'Q' if mode == 'batch' else 'A'
+
+    # go through the transactions, chunks are read as they are needed
+    rows = transactions(trace)
+    while True:
+
+        # next transaction in the trace
+        if sched is None:
+            row = next(rows, None)
 
-    # just pressing enter yields a SyntaxError, make exception
-    except SyntaxError:
+        else:
+
+            # next one released by the scheduler
+            wait, row = sched.next(rows, now())
 
-        # ignore error
-        pass
+            # nothing queued, skip straight to the next arrival
+            if wait:
+                yield delay(wait)
+                continue
 
-    key = 'A'
-    # go through the transactions
-    for i in range(len(t)):
+        # no transactions left
+        if row is None:
+            break
+        t, device, op, ts, tag = row
+
+        # step mode, wait for key press at a breakpoint
+        # or at every event after S was pressed
+        if mode == 'step':
+            if key.upper() != 'Q' and (key.upper() == 'S' or breaks.hit(now(), device, tag)):
+                log.flush()
+                key = pause("%s: Break at device %s tag %s. Press enter to continue, S to step or Q to run all events: " % (now(), device, tag))
 
         # wait for key press to continue
-        if key.upper() != 'Q':
-            try:
-                key = raw_input("%s: Pause. Press enter for next event or Q to run all events: " % now())
+        elif key.upper() != 'Q':
+            log.flush()
+            key = pause("%s: Pause. Press enter for next event or Q to run all events: " % now())
 
-            # just pressing enter yields a SyntaxError, make exception
-            except SyntaxError:
+        # hub starts on the transaction
+        started = now()
 
-                # ignore error
-                pass
+        # level it goes to, and its hits so far to tell if it hit
+        mem = mem2 if ts > 128 else mem1
+        hits = mem.hits
 
         # check operation, op = 0 is a SEND
-        if not op[i]:
+        if not op:
 
             # some output to tell us what is going on
-            print "%s: SEND tag %s size %s" % (now(), tag[i], ts[i])
+            if log.transactions:
+                log.write(now(), 'send', tag, ts)
 
             # cache's segregated according to transaction size
             # everything that is 128 bytes should be in L1
             # everything else is placed in L2
-            if ts[i] > 128:
+            if ts > 128:
 
                 # transaction size greater than 128 bytes
                 # access L2, check to see if tag in L2
@@ -533,7 +1925,7 @@ def hub(mem1, mem2):
                 # access and then resume execution at this point
                 # once that has finished
                 yield delay(16*bandwidth_delay_local)
-                yield mem2.access(1, tag[i], ts[i])
+                yield mem2.access(1, tag, ts)
 
             else:
 
@@ -544,21 +1936,23 @@ def hub(mem1, mem2):
                 # access and then resume execution at this point
                 # once that has finished
                 yield delay(16*bandwidth_delay_local)
-                yield mem1.access(1, tag[i], ts[i])
+                yield mem1.access(1, tag, ts)
 
             # transaction is finished
-            print "%s: SENT tag %s size %s" % (now(), tag[i], ts[i])
+            if log.transactions:
+                log.write(now(), 'sent', tag, ts)
 
         # op = 1, we have a REQUEST
         else:
 
             # some output to tell us what is going on
-            print "%s: REQUEST tag %s" % (now(), tag[i])
+            if log.transactions:
+                log.write(now(), 'request', tag)
 
             # cache's segregated according to transaction size
             # everything that is 128 bytes should be in L1
             # everything else is placed in L2
-            if ts[i] > 128:
+            if ts > 128:
 
                 # transaction size greater than 128 bytes
                 # access L2, check to see if tag in L2
@@ -567,7 +1961,7 @@ def hub(mem1, mem2):
                 # access and then resume execution at this point
                 # once that has finished
                 yield delay(16*bandwidth_delay_local)
-                yield mem2.access(0, tag[i], ts[i])
+                yield mem2.access(0, tag, ts)
 
             else:
 
@@ -578,43 +1972,469 @@ def hub(mem1, mem2):
                 # access and then resume execution at this point
                 # once that has finished
                 yield delay(16*bandwidth_delay_local)
-                yield mem1.access(0, tag[i], ts[i])
+                yield mem1.access(0, tag, ts)
 
             # transaction finished, check hit flag on L1 & L2 cache
             if mem1.hit:
 
                 # L1 indicates hit
-                print "%s REQUEST fulfilled by L1" % now()
+                if log.transactions:
+                    log.write(now(), 'fulfilled', 1)
                 mem1.hit = False
 
             elif mem2.hit:
 
                 # L2 indicates hit
-                print "%s REQUEST fulfilled by L2" % now()
+                if log.transactions:
+                    log.write(now(), 'fulfilled', 2)
                 mem2.hit = False
 
-    # simulation done, show stats
-    print '--------------------------------------'            
-    print '%s: Simulation finished. Showing stats' % now()
-    print 'L1 Hits: %s, L1 Misses: %s' % (mem1.hits, mem1.misses)
-    print 'L2 Hits: %s, L2 Misses: %s' % (mem2.hits, mem2.misses)
-    print 'Cumulative latency: %3.2f seconds' % (mem1.cum_latency + mem2.cum_latency)
-    print 'Total communication cost: $%3.2f' % (mem1.comm_cost + mem2.comm_cost)
-    print '--------------------------------------'
+        # done for the device, later for an outstanding miss
+        done = max(now(), mem.done_at)
+
+        # latency of the transaction by device, operation, level and result
+        if metrics is not None:
+            metrics.record(done - started, device,
+                           'request' if op else 'send', mem.name,
+                           'hit' if mem.hits > hits else 'miss')
+
+        # queueing delay, busy time and latency of the transaction
+        if sched is not None:
+            sched.record(device, t*sched.time_scale, started, now(), done)
+
+    # simulation done, make sure everything got logged
+    log.flush()
+
+
+class hierarchy:
+    """ Configuration of the hub memory hierarchy """
+
+    def __init__(self, l1='M20', l2='M32', l2_count=10, policy='FIFO',
+                 l1_policy=None, l2_policy=None, timing='phase',
+                 engine='event', seed=0, payload=True, dc_memory=None,
+                 dc_file=None, mshrs=0, time_scale=None,
+                 arbitration='oldest', banked=False, interleave='modulo',
+                 write_policy='write-back', read_allocate=False, victim=0,
+                 exclusive=False):
+        """
+            Initialization, defaults to the hierarchy of the
+            project: L1 is one M2 memory with 4 cache lines,
+            L2 is 10 M3 memories with 1 cache line each
+
+            :param input l1: memory option for L1, a name in MEMORIES
+            :param input l2: memory option for L2, a name in MEMORIES
+            :param input l2_count: number of memories making up L2
+            :param input policy: eviction policy of both levels
+            :param input l1_policy: eviction policy of L1, overrides policy
+            :param input l2_policy: eviction policy of L2, overrides policy
+            :param input timing: timing model of the caches
+            :param input engine: simulation engine, 'event' or 'myhdl'
+            :param input seed: seed for random data and RANDOM eviction
+            :param input payload: keep random data in the cache lines
+            :param input dc_memory: if given, the data center is kept on
+                                    disk with at most this many bytes of
+                                    lines in memory, see datacenter.py
+            :param input dc_file: file for the data center on disk,
+                                  a temporary file if None
+            :param input mshrs: outstanding read misses per level,
+                                0 for a blocking hub
+            :param input time_scale: release transactions at their trace
+                                     time, this many clock cycles per
+                                     unit of time. None replays them
+                                     back to back
+            :param input arbitration: which device the hub serves next,
+                                      'oldest' or 'round-robin'
+            :param input banked: model the l2_count memories of L2 as
+                                 banks that work at the same time
+            :param input interleave: bank of a tag, a name in INTERLEAVE
+                                     or a function (tag, banks) -> bank
+            :param input write_policy: 'write-back', 'write-through' or
+                                       'write-around'
+            :param input read_allocate: put the lines of read misses in
+                                        the cache
+            :param input victim: lines of a victim buffer shared by the
+                                 levels, 0 for none
+            :param input exclusive: a line is in one level only, L1
+                                    evictions move to L2 if it has room
+                                    and read misses are served by the
+                                    other level
+        """
+        self.l1 = l1
+        self.l2 = l2
+        self.l2_count = l2_count
+        self.l1_policy = l1_policy or policy
+        self.l2_policy = l2_policy or policy
+        self.timing = timing
+        self.engine = engine
+        self.seed = seed
+        self.payload = payload
+        self.dc_memory = dc_memory
+        self.dc_file = dc_file
+        self.mshrs = mshrs
+        self.time_scale = time_scale
+        self.arbitration = arbitration
+        self.banked = banked
+        self.interleave = interleave
+        self.write_policy = write_policy
+        self.read_allocate = read_allocate
+        self.victim = victim
+        self.exclusive = exclusive
+
+    def build(self, log=None):
+        """
+            Create the L1 & L2 caches, sharing a new data center
+
+            :param input log: event log shared by the caches
+        """
+
+        # holds data in the data center
+        # aka "Main memory", on disk if it has a memory cap
+        if self.dc_memory is None:
+            data_center = {}
+        else:
+            data_center = datacenter(self.dc_memory, self.dc_file)
+
+        # both levels talk to the data center over the same link
+        link = satellite()
+
+        # and evict to the same victim buffer, as fast as M1
+        if self.victim:
+            victim = victimbuffer(self.victim, M1_latency)
+        else:
+            victim = None
+
+        # Level 1 memory module
+        lines, latency = MEMORIES[self.l1]
+        mem1 = cache(max_capacity=lines, latency=latency,
+                     policy=self.l1_policy, timing=self.timing,
+                     seed=self.seed, data_center=data_center, log=log,
+                     payload=self.payload, mshrs=self.mshrs, link=link,
+                     write_policy=self.write_policy,
+                     read_allocate=self.read_allocate, victim=victim,
+                     name='L1')
+
+        # Level 2 memory module, l2_count memories of the same kind
+        # different seed so L2 data isn't a copy of L1 data
+        lines, latency = MEMORIES[self.l2]
+        mem2 = cache(max_capacity=self.l2_count*lines, latency=latency,
+                     policy=self.l2_policy, timing=self.timing,
+                     seed=self.seed + 1, data_center=data_center, log=log,
+                     payload=self.payload, mshrs=self.mshrs, link=link,
+                     banks=self.l2_count if self.banked else None,
+                     interleave=self.interleave,
+                     write_policy=self.write_policy,
+                     read_allocate=self.read_allocate, victim=victim,
+                     name='L2')
+
+        # one hierarchy instead of two caches split by size
+        if self.exclusive:
+            mem1.peer, mem2.peer = mem2, mem1
+            mem1.lower = mem2
+
+        return mem1, mem2
+
+
+class stats:
+    """ Results of one simulation """
+
+    def __init__(self, mem1, mem2, time, events=None, sched=None,
+                 metrics=None):
+        """
+            Collect the performance statistics of the caches
+
+            :param input mem1: Level 1 memory module
+            :param input mem2: Level 2 memory module
+            :param input time: simulation time at the end, clock cycles
+            :param input events: generator resumptions, if the engine counts them
+            :param input sched: scheduler, if transactions were released
+                                at their trace time
+            :param input metrics: latency histograms of the transactions
+        """
+        self.l1_hits = mem1.hits
+        self.l1_misses = mem1.misses
+        self.l2_hits = mem2.hits
+        self.l2_misses = mem2.misses
+        self.cum_latency = mem1.cum_latency + mem2.cum_latency
+        self.comm_cost = mem1.comm_cost + mem2.comm_cost
+
+        # where the latency went: waiting on other transactions for an
+        # MSHR or the satellite link, the rest is link & memory time
+        self.wait_latency = mem1.wait_latency + mem2.wait_latency
+        self.link_latency = self.cum_latency - self.wait_latency
+
+        # time the hub was stuck behind satellite transfers, not a part
+        # of the latency split above: the same time is also in the
+        # latency of the transfers it waited for
+        self.hol_blocking = mem1.hol_blocking + mem2.hol_blocking
+        self.merged = mem1.merged + mem2.merged
+
+        # trips to the data center, and the ones clean lines saved
+        self.writebacks = mem1.writebacks + mem2.writebacks
+        self.clean_evictions = mem1.clean_evictions + mem2.clean_evictions
+        self.saved_bytes = mem1.saved_bytes + mem2.saved_bytes
+        self.saved_cost = mem1.saved_cost + mem2.saved_cost
+        self.write_policy = mem1.write_policy
+
+        # read misses kept in the cache, and tags nobody had
+        self.read_fills = mem1.read_fills + mem2.read_fills
+        self.not_found = mem1.not_found + mem2.not_found
+
+        # read misses that stayed in the hub, and L1 lines kept in L2
+        self.victim_hits = mem1.victim_hits + mem2.victim_hits
+        self.peer_hits = mem1.peer_hits + mem2.peer_hits
+        self.demotions = mem1.demotions + mem2.demotions
+
+        self.time = time
+        self.events = events
+
+        # banks of L2: accesses, conflicts, cycles waited, utilization
+        if mem2.banked:
+            self.banks = [(mem2.bank_accesses[b], mem2.bank_conflicts[b],
+                           mem2.bank_wait[b]*CYCLE,
+                           float(mem2.bank_busy[b])/time if time else 0.0)
+                          for b in range(mem2.banks)]
+        else:
+            self.banks = None
+
+        # queueing under the arrival pattern of the trace
+        if sched is not None:
+            self.queue_delay = sched.queue_delay*CYCLE
+            self.utilization = float(sched.busy)/time if time else 0.0
+            self.link_utilization = float(mem1.link.busy)/time if time else 0.0
+            self.longest_queue = sched.longest
+            self.device_latency = dict(
+                (device, (n, p50*CYCLE, p95*CYCLE, p99*CYCLE, top*CYCLE))
+                for device, (n, p50, p95, p99, top) in sched.percentiles().items())
+        else:
+            self.queue_delay = None
+            self.device_latency = None
+
+        # latency of every transaction by device, operation, level and result
+        self.metrics = metrics
+        self.latency = metrics.summary() if metrics is not None else None
+
+        # counters of a data center on disk
+        dc = mem1.data_center
+        if isinstance(dc, datacenter):
+            self.dc_hit_rate = dc.hit_rate()
+            self.dc_bytes_read = dc.bytes_read
+            self.dc_bytes_written = dc.bytes_written
+        else:
+            self.dc_hit_rate = None
+            self.dc_bytes_read = 0
+            self.dc_bytes_written = 0
+
+    def show(self):
+        """ Nice print out of the stats """
+        print '--------------------------------------'            
+        print '%s: Simulation finished. Showing stats' % self.time
+        print 'L1 Hits: %s, L1 Misses: %s' % (self.l1_hits, self.l1_misses)
+        print 'L2 Hits: %s, L2 Misses: %s' % (self.l2_hits, self.l2_misses)
+        print 'Cumulative latency: %3.2f seconds' % self.cum_latency
+        print '  = link time: %3.2f seconds + waiting for MSHRs/link: %3.2f seconds' % (
+            self.link_latency, self.wait_latency)
+        print 'Head-of-line blocking: %3.2f seconds (hub stalled, overlaps the latency above), merged misses: %s' % (
+            self.hol_blocking, self.merged)
+        print 'Total communication cost: $%3.2f' % self.comm_cost
+        if self.write_policy == 'write-back':
+            print 'Write-backs: %s, clean evictions: %s, saved %s bytes / $%3.2f' % (
+                self.writebacks, self.clean_evictions, self.saved_bytes, self.saved_cost)
+        else:
+            print 'Write-backs: %s, clean evictions: %s, saved n/a (%s)' % (
+                self.writebacks, self.clean_evictions, self.write_policy)
+        print 'Read misses filled: %s, not found in data center: %s' % (
+            self.read_fills, self.not_found)
+        print 'Victim buffer hits: %s, other level hits: %s, L1 lines moved to L2: %s' % (
+            self.victim_hits, self.peer_hits, self.demotions)
+        if self.dc_hit_rate is not None:
+            print 'Data center memory hit rate: %3.2f, disk bytes read: %s, written: %s' % (
+                self.dc_hit_rate, self.dc_bytes_read, self.dc_bytes_written)
+        if self.banks is not None:
+            print 'L2 bank  Accesses  Conflicts  Waited (s)  Utilization'
+            for b, (accesses, conflicts, waited, busy) in enumerate(self.banks):
+                print '%7s  %8s  %9s  %10.2f  %11.4f' % (b, accesses, conflicts, waited, busy)
+        if self.queue_delay is not None:
+            print 'Queueing delay: %3.2f seconds, longest queue: %s' % (
+                self.queue_delay, self.longest_queue)
+            print 'Utilization: hub %3.2f, satellite link %3.2f' % (
+                self.utilization, self.link_utilization)
+            print 'Device  Transactions  Latency p50/p95/p99/max (seconds)'
+            for device in sorted(self.device_latency):
+                n, p50, p95, p99, top = self.device_latency[device]
+                print '%6s  %12s  %3.2f / %3.2f / %3.2f / %3.2f' % (
+                    device, n, p50, p95, p99, top)
+        if self.latency:
+            print 'Device  Op       Level  Result  Transactions  Latency p50/p95/p99/max (seconds)'
+            for row in self.latency:
+                print '%6s  %-7s  %5s  %6s  %12s  %.3g / %.3g / %.3g / %.3g' % (
+                    row['device'], row['op'], row['level'], row['result'],
+                    row['count'], row['p50'], row['p95'], row['p99'], row['max'])
+        print '--------------------------------------'
+
+
+def load_trace(fname):
+    """
+        Load a whole traffic file, for traces used many times.
+        Binary trace files are memory mapped, not copied.
+
+        Returns a structured array of transactions, see tracefile.py
+
+        :param input fname: filename of the csv file
+    """
+    return load(fname)
+
+
+def simulate(trace, config=None, log=None):
+    """
+        Run a trace through a hub memory hierarchy
+
+        Every call builds its own caches and data center, so
+        simulations don't share any state and the same trace can be
+        used for many of them. Returns a stats object.
+
+        :param input trace: structured array of transactions, an
+                            iterable of chunks, or the filename of a
+                            traffic file or binary trace file
+        :param input config: hierarchy, defaults to the project's
+        :param input log: event log, defaults to summary level (silent)
+    """
+    if config is None:
+        config = hierarchy()
+
+    # stream traffic files, map binary trace files
+    if isinstance(trace, basestring):
+        trace = open_trace(trace)
+
+    # pick the simulation engine
+    use_engine(config.engine)
+
+    # fresh caches & data center for this run
+    mem1, mem2 = config.build(log)
+
+    # release transactions at their trace time if asked to
+    sched = None
+    if config.time_scale is not None:
+        sched = scheduler(config.time_scale, config.arbitration)
+
+    # latency of every transaction
+    latency = metrics(CYCLE)
+
+    # replay the trace, no pauses
+    sim = Simulation(hub(mem1, mem2, trace, mode='batch', sched=sched,
+                         metrics=latency))
+    sim.run(quiet=1)
+
+    # bookkeeping of the lines still adds up
+    mem1.check()
+    mem2.check()
+
+    result = stats(mem1, mem2, now(), getattr(sim, 'events', None), sched,
+                   latency)
+
+    # done with a data center on disk
+    if isinstance(mem1.data_center, datacenter):
+        mem1.data_center.close()
+
+    return result
 
 def main():
     """ Main function """
 
+    # parse the arguments
+    arguments = parser.parse_args()
+
+    # pick the simulation engine
+    use_engine(arguments.engine)
+
+    # use numpy to load data from csv file
+    if not isfile(join(arguments.fname)):
+        print 'ERROR: %s does NOT exist' % arguments.fname
+        exit(1)
+    # stream the transactions in chunks as the hub needs them
+    # binary trace files are memory mapped
+    trace = open_trace(arguments.fname)
+
+    # Level 1 memory module, 1 M2 memory with 4 cache lines of 128 Bytes each
+    # Level 2 memory module, 10 M3 memories each with 1 cache line of 1kB
+    config = hierarchy(l1='M20', l2='M32', l2_count=10,
+                       policy=arguments.policy,
+                       l1_policy=arguments.l1_policy,
+                       l2_policy=arguments.l2_policy,
+                       timing=arguments.timing, seed=arguments.seed,
+                       payload=arguments.payload,
+                       dc_memory=arguments.dc_memory and arguments.dc_memory << 20,
+                       dc_file=arguments.dc_file,
+                       mshrs=arguments.mshrs,
+                       time_scale=arguments.time_scale,
+                       arbitration=arguments.arbitration,
+                       banked=arguments.banked,
+                       interleave=arguments.interleave,
+                       write_policy=arguments.write_policy,
+                       read_allocate=arguments.read_allocate,
+                       victim=arguments.victim,
+                       exclusive=arguments.exclusive)
+
+    # where and how much to log
+    log = open_log(arguments.log_level, arguments.log_file,
+                   arguments.log_format)
+    L1, L2 = config.build(log)
+
+    # breakpoints imply step mode
+    breaks = breakpoints(arguments.break_tags, arguments.break_devices,
+                         arguments.break_time)
+    mode = arguments.mode
+    if mode == 'interactive' and (breaks.tags or breaks.devices or
+                                  breaks.time is not None):
+        mode = 'step'
+
+    # release transactions at their trace time if asked to
+    sched = None
+    if config.time_scale is not None:
+        sched = scheduler(config.time_scale, config.arbitration)
+
+    # time the phases of the model, wrapping it before the hub starts
+    if arguments.profile:
+        from instrument import profiler
+        profile = profiler(sys.modules[__name__])
+        profile.enable()
+
+    # latency of every transaction
+    latency = metrics(CYCLE)
+
     # instantiate hub with L1 & L2 caches
-    link = hub(L1, L2)
+    link = hub(L1, L2, trace, mode, breaks, sched, latency)
+
+    # using the simulation environment, give it the hub
+    sim = Simulation(link)
+
+    # run simulation
+    sim.run(quiet=1)
+    log.close()
+
+    # bookkeeping of the lines still adds up
+    L1.check()
+    L2.check()
+
+    # where the time went
+    if arguments.profile:
+        profile.disable()
+        profile.report()
+        if arguments.profile_file:
+            profile.collapsed(arguments.profile_file)
+
+    # simulation done, show stats
+    stats(L1, L2, now(), sched=sched, metrics=latency).show()
+
+    # export the latency histograms
+    if arguments.metrics:
+        latency.write(arguments.metrics, arguments.metrics_format)
 
-    # return local generator for simulation
-    return link
+    # done with a data center on disk
+    if isinstance(L1.data_center, datacenter):
+        L1.data_center.close()
 
-# using MyHDL simulation environment, give it main
-sim = Simulation(main())
 
-# run simulation
-sim.run()
+if __name__ == '__main__':
+    main()
 
 """ ************End of program***************** """
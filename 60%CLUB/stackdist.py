@@ -0,0 +1,226 @@
+"""
+    Stack distance (Mattson) analysis of a traffic file
+
+    One pass over the trace gives the LRU hit/miss counts for every
+    cache capacity at once, instead of running the simulation once per
+    memory option. The trace is split into the L1 and L2 streams with
+    the same rule the hub uses (ts > 128 goes to L2).
+
+    For every access the stack distance is the number of distinct tags
+    used since the last access to the same tag. With LRU the access
+    hits in a cache of C lines exactly when its stack distance is less
+    than C. The distinct tags are counted with a Fenwick tree over
+    access positions where only the latest access of each tag is
+    marked, so each access costs O(log n).
+
+    Every SEND and REQUEST counts as a use of the line, so the numbers
+    are for LRU caches that also fill on read misses.
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+# used for reading in the CSV files
+import numpy as np
+
+# use argparse package, parses command line arguments
+import argparse
+
+# import isfile function to make sure
+# the csv file provided exists
+from os.path import isfile
+
+# memory options and trace loading of the hub model
+from sim import MEMORIES, load_trace
+
+
+""" cache size options in lines, L1 is one memory, L2 is 10 memories """
+OPTIONS = [('L1', name, MEMORIES[name][0]) for name in ('M1', 'M20', 'M21')] + \
+          [('L2', '10*' + name, 10*MEMORIES[name][0]) for name in ('M30', 'M31', 'M32')]
+
+
+def stack_distances(tags):
+    """
+        LRU stack distance of every access
+
+        Returns a NumPy array with the stack distance of each access,
+        -1 for the first access to a tag (cold miss).
+
+        :param input tags: sequence of tags in access order
+    """
+
+    n = len(tags)
+
+    # Fenwick tree over access positions 1..n
+    # position i is marked if access i is the latest one to its tag
+    tree = [0]*(n + 1)
+
+    # position of the latest access to each tag
+    last = {}
+
+    # stack distance of every access
+    dist = np.empty(n, dtype=np.int64)
+
+    # number of marked positions so far
+    marked = 0
+
+    for i in xrange(1, n + 1):
+        tag = tags[i - 1]
+        p = last.get(tag)
+
+        if p is None:
+
+            # never seen before, cold miss
+            dist[i - 1] = -1
+
+        else:
+
+            # marks at positions 1..p
+            j = p
+            s = 0
+            while j:
+                s += tree[j]
+                j -= j & -j
+
+            # distinct tags used after p
+            dist[i - 1] = marked - s
+
+            # unmark p, it is not the latest access anymore
+            j = p
+            while j <= n:
+                tree[j] -= 1
+                j += j & -j
+            marked -= 1
+
+        # mark i as the latest access to tag
+        j = i
+        while j <= n:
+            tree[j] += 1
+            j += j & -j
+        marked += 1
+        last[tag] = i
+
+    return dist
+
+
+def hit_counts(dist, max_lines):
+    """
+        Hits for every capacity from 1 to max_lines
+
+        Returns an array where element C-1 is the number of hits
+        in an LRU cache of C lines.
+
+        :param input dist:      stack distances from stack_distances()
+        :param input max_lines: largest capacity in lines
+    """
+
+    # how many accesses have each finite stack distance
+    # distances past max_lines can't hit in any of the capacities
+    finite = dist[(dist >= 0) & (dist < max_lines)]
+    counts = np.bincount(finite, minlength=max_lines)
+
+    # distance d hits in every cache with more than d lines
+    return np.cumsum(counts)
+
+
+def analyze(ts, tag, max_lines=None):
+    """
+        Hit/miss counts of the L1 and L2 streams for every capacity
+
+        Returns a dict with 'L1' and 'L2' entries, each a tuple of
+        (accesses, hits per capacity), and the largest capacity.
+
+        :param input ts:        transaction sizes
+        :param input tag:       tags
+        :param input max_lines: largest capacity, defaults to the most
+                                distinct tags in either stream
+    """
+
+    # route the accesses the same way the hub does
+    l2 = ts > 128
+    streams = {'L1': tag[~l2], 'L2': tag[l2]}
+
+    # more lines than distinct tags doesn't make a difference
+    if max_lines is None:
+        max_lines = max([len(np.unique(s)) for s in streams.values()] + [1])
+
+    result = {}
+    for level, tags in streams.items():
+        dist = stack_distances(tags.tolist())
+        result[level] = (len(tags), hit_counts(dist, max_lines))
+    return result, max_lines
+
+
+if __name__ == '__main__':
+
+    # initialize argument parser
+    parser = argparse.ArgumentParser()
+
+    # argument for filename of traffic file
+    parser.add_argument('-f',
+                        action='store',
+                        dest='fname',
+                        required=True,
+                        help='filename'
+                        )
+
+    # argument for largest capacity to report
+    parser.add_argument('-n', '--max-lines',
+                        action='store',
+                        dest='max_lines',
+                        type=int,
+                        help='largest capacity in cache lines to report'
+                        )
+
+    # argument for writing the table to a csv file
+    parser.add_argument('-o',
+                        action='store',
+                        dest='output',
+                        help='write the table to this csv file'
+                        )
+
+    # parse the arguments
+    arguments = parser.parse_args()
+
+    # use numpy to load data from csv file
+    if not isfile(arguments.fname):
+        print 'ERROR: %s does NOT exist' % arguments.fname
+        exit(1)
+    trace = load_trace(arguments.fname)
+    ts = trace['ts']      # transaction size
+    tag = trace['tag']    # tag
+
+    # one pass per stream
+    result, max_lines = analyze(ts, tag, arguments.max_lines)
+    l1_n, l1_hits = result['L1']
+    l2_n, l2_hits = result['L2']
+
+    # table with a row per capacity
+    lines = np.arange(1, max_lines + 1)
+    table = np.column_stack((lines, l1_hits, l1_n - l1_hits,
+                             l2_hits, l2_n - l2_hits))
+
+    print '--------------------------------------'
+    print 'Lines  L1 Hits  L1 Misses  L2 Hits  L2 Misses'
+    for row in table:
+        print '%5d  %7d  %9d  %7d  %9d' % tuple(row)
+    print '--------------------------------------'
+
+    # the memory options at the top of sim.py
+    print 'Memory options:'
+    for level, name, option_lines in OPTIONS:
+        n, hits = result[level]
+
+        # past the distinct tags every capacity does the same
+        if option_lines > max_lines and arguments.max_lines is not None:
+            print '%s = %-6s (%3d lines) past --max-lines' % (level, name, option_lines)
+            continue
+        h = hits[min(option_lines, max_lines) - 1]
+        print '%s = %-6s (%3d lines) Hits: %s, Misses: %s' % (level, name, option_lines, h, n - h)
+    print '--------------------------------------'
+
+    # optionally save the table
+    if arguments.output:
+        np.savetxt(arguments.output, table, fmt='%d', delimiter=',',
+                   header='lines,l1_hits,l1_misses,l2_hits,l2_misses')
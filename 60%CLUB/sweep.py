@@ -0,0 +1,326 @@
+"""
+    Design space sweep over hub memory hierarchies
+
+    Runs every combination of L1 memory option, L2 memory option,
+    number of L2 memories and eviction policy on every traffic file,
+    spread over a pool of worker processes. The traffic files are
+    loaded once in the parent and handed to the workers when the pool
+    starts, so no worker parses a CSV file.
+
+    Results are summed over the traffic files and printed as a table
+    of communication cost, cumulative latency and hit rates. The
+    Pareto optimal hierarchies (nothing else is both cheaper and
+    faster) are marked with a *. The CSV file has the same table for
+    every traffic file as well, so a hierarchy that does badly on one
+    of them shows up, with the sums in the rows of trace 'total'.
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+# used for reading in the CSV files
+import numpy as np
+
+# use argparse package, parses command line arguments
+import argparse
+
+# process pool for running the simulations
+from multiprocessing import Pool, cpu_count
+
+# import isfile function to make sure
+# the csv files provided exist
+from os.path import isfile
+
+# the hub model
+import sim
+
+
+# traffic files, set in every worker by init_worker()
+traces = None
+
+
+def init_worker(shared_traces):
+    """
+        Pool initializer, keeps the traffic files
+
+        :param input shared_traces: list of structured arrays of
+                                    transactions, one per traffic file
+    """
+    global traces
+    traces = shared_traces
+
+
+def run_config(task):
+    """
+        Simulate one hierarchy on one traffic file
+
+        Returns (config number, trace number, L1 hits, L1 misses,
+        L2 hits, L2 misses, communication cost, cumulative latency)
+
+        :param input task: (config number, trace number, config, options)
+    """
+    i, j, config, options = task
+    l1_mem, l2_mem, l2_count, policy = config
+    (timing, seed, engine, payload, mshrs, time_scale, banked, write_policy,
+     read_allocate, victim, exclusive) = options
+
+    # same seed, so same random data for every hierarchy
+    result = sim.simulate(traces[j], sim.hierarchy(
+        l1=l1_mem, l2=l2_mem, l2_count=l2_count, policy=policy,
+        timing=timing, engine=engine, seed=seed, payload=payload,
+        mshrs=mshrs, time_scale=time_scale, banked=banked,
+        write_policy=write_policy, read_allocate=read_allocate,
+        victim=victim, exclusive=exclusive))
+
+    return (i, j, result.l1_hits, result.l1_misses, result.l2_hits,
+            result.l2_misses, result.comm_cost, result.cum_latency)
+
+
+def pareto(points, digits=2):
+    """
+        Flags for the Pareto optimal points when minimizing both values
+
+        The values are compared rounded, so points that print the same
+        get the same flag instead of one of them losing on float noise.
+
+        :param input points: list of (cost, latency)
+        :param input digits: decimals the values are rounded to, the
+                             ones the table shows
+    """
+    points = [(round(a, digits), round(b, digits)) for a, b in points]
+    optimal = []
+    for a in points:
+        dominated = False
+        for b in points:
+            if b[0] <= a[0] and b[1] <= a[1] and b != a:
+                dominated = True
+                break
+        optimal.append(not dominated)
+    return optimal
+
+
+def rate(hits, misses):
+    """ Hit rate, guards against levels that never got used """
+    return float(hits)/(hits + misses) if hits + misses else 0.0
+
+
+def table(configs, values):
+    """
+        Rows of the results table, fastest first
+
+        Returns a list of (Pareto optimal, config, cost, latency,
+        L1 hit rate, L2 hit rate)
+
+        :param input configs: list of (l1, l2, l2_count, policy)
+        :param input values: (L1 hits, L1 misses, L2 hits, L2 misses,
+                             cost, latency) of every config
+    """
+    optimal = pareto([(row[4], row[5]) for row in values])
+
+    rows = []
+    for config, row, best in zip(configs, values, optimal):
+        l1h, l1m, l2h, l2m, cost, latency = row
+        rows.append((best, config, cost, latency, rate(l1h, l1m), rate(l2h, l2m)))
+
+    # fastest first
+    rows.sort(key=lambda r: r[3])
+    return rows
+
+
+if __name__ == '__main__':
+
+    # initialize argument parser
+    parser = argparse.ArgumentParser()
+
+    # argument for filenames of traffic files
+    parser.add_argument('-f',
+                        action='store',
+                        dest='fnames',
+                        nargs='+',
+                        required=True,
+                        help='filenames'
+                        )
+
+    # arguments for the grid of hierarchies
+    parser.add_argument('--l1',
+                        action='store',
+                        nargs='+',
+                        choices=sorted(sim.MEMORIES),
+                        default=['M1', 'M20', 'M21'],
+                        help='memory options for L1'
+                        )
+    parser.add_argument('--l2',
+                        action='store',
+                        nargs='+',
+                        choices=sorted(sim.MEMORIES),
+                        default=['M30', 'M31', 'M32'],
+                        help='memory options for L2'
+                        )
+    parser.add_argument('--l2-count',
+                        action='store',
+                        dest='l2_count',
+                        nargs='+',
+                        type=int,
+                        default=[10],
+                        help='numbers of memories making up L2'
+                        )
+    parser.add_argument('-p', '--policies',
+                        action='store',
+                        dest='policies',
+                        nargs='+',
+                        choices=sorted(sim.POLICIES),
+                        default=['FIFO'],
+                        help='eviction policies'
+                        )
+
+    # arguments passed on to every simulation
+    parser.add_argument('-t', '--timing',
+                        action='store',
+                        dest='timing',
+                        choices=['phase', 'bit'],
+                        default='phase',
+                        help='timing model of the caches'
+                        )
+    parser.add_argument('-s', '--seed',
+                        action='store',
+                        dest='seed',
+                        type=int,
+                        default=0,
+                        help='seed for random data and the RANDOM policy'
+                        )
+    parser.add_argument('-e', '--engine',
+                        action='store',
+                        dest='engine',
+                        choices=['event', 'myhdl'],
+                        default='event',
+                        help='simulation engine'
+                        )
+    parser.add_argument('--no-payload',
+                        action='store_false',
+                        dest='payload',
+                        help='cache lines only keep their tag, size and state'
+                        )
+    parser.add_argument('--mshrs',
+                        action='store',
+                        dest='mshrs',
+                        type=int,
+                        default=0,
+                        help='outstanding read misses per cache level'
+                        )
+    parser.add_argument('--arrivals',
+                        action='store',
+                        dest='time_scale',
+                        type=int,
+                        nargs='?',
+                        const=1,
+                        help='release transactions at their trace time, '
+                             'optionally clock cycles per unit of trace time'
+                        )
+    parser.add_argument('--banked',
+                        action='store_true',
+                        dest='banked',
+                        help='model the memories of L2 as banks'
+                        )
+    parser.add_argument('-w', '--write-policy',
+                        action='store',
+                        dest='write_policy',
+                        choices=['write-back', 'write-through', 'write-around'],
+                        default='write-back',
+                        help='when writes go to the data center'
+                        )
+    parser.add_argument('--read-allocate',
+                        action='store_true',
+                        dest='read_allocate',
+                        help='keep the lines of read misses in the cache'
+                        )
+    parser.add_argument('--victim',
+                        action='store',
+                        dest='victim',
+                        type=int,
+                        default=0,
+                        help='lines of a victim buffer shared by L1 and L2'
+                        )
+    parser.add_argument('--exclusive',
+                        action='store_true',
+                        dest='exclusive',
+                        help='move lines between L1 and L2 instead of '
+                             'splitting them by size'
+                        )
+
+    # argument for number of worker processes
+    parser.add_argument('-j', '--jobs',
+                        action='store',
+                        dest='jobs',
+                        type=int,
+                        default=cpu_count(),
+                        help='number of worker processes'
+                        )
+
+    # argument for writing the table to a csv file
+    parser.add_argument('-o',
+                        action='store',
+                        dest='output',
+                        help='write the table to this csv file'
+                        )
+
+    # parse the arguments
+    arguments = parser.parse_args()
+
+    # load every traffic file once
+    shared_traces = []
+    for fname in arguments.fnames:
+        if not isfile(fname):
+            print 'ERROR: %s does NOT exist' % fname
+            exit(1)
+        shared_traces.append(sim.load_trace(fname))
+
+    # every combination of the grid
+    configs = [(l1, l2, n, p)
+               for l1 in arguments.l1
+               for l2 in arguments.l2
+               for n in arguments.l2_count
+               for p in arguments.policies]
+    options = (arguments.timing, arguments.seed, arguments.engine,
+               arguments.payload, arguments.mshrs, arguments.time_scale,
+               arguments.banked, arguments.write_policy,
+               arguments.read_allocate, arguments.victim, arguments.exclusive)
+    tasks = [(i, j, config, options)
+             for i, config in enumerate(configs)
+             for j in range(len(shared_traces))]
+
+    # run them all, the traces go to the workers once
+    pool = Pool(arguments.jobs, init_worker, (shared_traces,))
+    results = pool.map(run_config, tasks, chunksize=1)
+    pool.close()
+    pool.join()
+
+    # every hierarchy on every traffic file
+    values = np.zeros((len(shared_traces), len(configs), 6))
+    for result in results:
+        values[result[1], result[0]] = result[2:]
+
+    # and summed up over the traffic files
+    rows = table(configs, values.sum(axis=0))
+
+    print '--------------------------------------'
+    print '%d hierarchies, %d traffic files' % (len(configs), len(shared_traces))
+    print '  L1   L2       Policy  Cost($)  Latency(s)  L1 Hit  L2 Hit'
+    for best, (l1, l2, n, p), cost, latency, l1r, l2r in rows:
+        print '%s %-4s %2dx%-4s %-6s  %7.2f  %10.2f  %6.2f  %6.2f' % (
+            '*' if best else ' ', l1, n, l2, p, cost, latency, l1r, l2r)
+    print '* Pareto optimal (no other hierarchy is both cheaper and faster)'
+    print '--------------------------------------'
+
+    # optionally save the table of every traffic file and the sums
+    if arguments.output:
+        tables = [(fname, table(configs, trace_values))
+                  for fname, trace_values in zip(arguments.fnames, values)]
+        tables.append(('total', rows))
+        with open(arguments.output, 'w') as f:
+            f.write('trace,l1,l2,l2_count,policy,comm_cost,cum_latency,'
+                    'l1_hit_rate,l2_hit_rate,pareto\n')
+            for fname, trace_rows in tables:
+                for best, (l1, l2, n, p), cost, latency, l1r, l2r in trace_rows:
+                    f.write('%s,%s,%s,%d,%s,%f,%f,%f,%f,%d\n' % (
+                        fname, l1, l2, n, p, cost, latency, l1r, l2r, best))
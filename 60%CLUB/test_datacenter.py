@@ -0,0 +1,97 @@
+"""
+    Tests of the disk backed data center
+
+    python -m unittest discover -s . -p 'test_*.py'
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+import unittest
+from os.path import dirname, join
+
+import sim
+from datacenter import datacenter, line_bytes, ENTRY_BYTES
+
+
+def line(tag, words=64):
+    """ Line of words that tell which tag it belongs to """
+    return (np.arange(words) + tag).astype(np.uint16)
+
+
+class memory_cap(unittest.TestCase):
+
+    def setUp(self):
+        # room for three lines of 64 words
+        self.dc = datacenter(3*line_bytes(line(0)))
+
+    def tearDown(self):
+        self.dc.close()
+
+    def test_byte_cap(self):
+        for tag in range(10):
+            self.dc[tag] = line(tag)
+            self.assertLessEqual(self.dc.used_bytes, self.dc.memory_bytes)
+        self.assertEqual(list(self.dc.memory), [7, 8, 9])
+        self.assertEqual(self.dc.used_bytes, 3*(128 + ENTRY_BYTES))
+        self.assertEqual(self.dc.bytes_written, 10*128)
+
+    def test_read_back(self):
+        for tag in range(10):
+            self.dc[tag] = line(tag)
+
+        # from the log, then from memory
+        self.assertEqual(self.dc[0].tolist(), line(0).tolist())
+        self.assertEqual(self.dc[0].tolist(), line(0).tolist())
+        self.assertEqual((self.dc.memory_misses, self.dc.memory_hits), (1, 1))
+        self.assertEqual(self.dc.bytes_read, 128)
+        self.assertAlmostEqual(self.dc.hit_rate(), 0.5)
+
+        # reading it made 0 the most recently used, 7 went
+        self.assertEqual(list(self.dc.memory), [8, 9, 0])
+
+    def test_latest_copy(self):
+        # a line evicted again is read back as written last
+        self.dc[1] = line(1)
+        self.dc[1] = line(50, words=8)
+        for tag in range(2, 10):
+            self.dc[tag] = line(tag)
+        self.assertEqual(self.dc[1].tolist(), line(50, words=8).tolist())
+        self.assertEqual(len(self.dc), 9)
+        self.assertIn(1, self.dc)
+        self.assertNotIn(10, self.dc)
+
+    def test_no_payload(self):
+        # lines that are only a number of words are bounded as well,
+        # and never go to the log
+        dc = datacenter(10*ENTRY_BYTES)
+        for tag in range(1000):
+            dc[tag] = 64
+        self.assertEqual(len(dc.memory), 10)
+        self.assertEqual(dc.bytes_written, 0)
+        self.assertEqual(dc[0], 64)
+        self.assertEqual(dc.bytes_read, 0)
+        dc.close()
+
+
+class simulation(unittest.TestCase):
+
+    def test_same_as_dict(self):
+        # with no room in memory every line is read back from the log,
+        # which only changes where the lines come from
+        trace = sim.load_trace(join(dirname(__file__),
+                                    'final_project_traffic_2.csv'))
+        plain, on_disk = [sim.simulate(trace, sim.hierarchy(dc_memory=dc_memory))
+                          for dc_memory in (None, 1)]
+        self.assertGreater(on_disk.dc_bytes_read, 0)
+        self.assertEqual(on_disk.dc_hit_rate, 0.0)
+        for name in ('l1_hits', 'l1_misses', 'l2_hits', 'l2_misses',
+                     'comm_cost', 'cum_latency'):
+            self.assertEqual(getattr(plain, name), getattr(on_disk, name), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+    Tests of the event engine, against MyHDL where it is installed
+
+    python -m unittest discover -s . -p 'test_*.py'
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+import unittest
+from os.path import dirname, join
+
+import engine
+import sim
+
+# MyHDL is optional, the engine is compared to it when it's there
+try:
+    import myhdl
+except ImportError:
+    myhdl = None
+
+
+def scenarios(m):
+    """
+        Run every use of the generator protocol the hub makes on the
+        engine module m (engine or myhdl)
+
+        Returns the (time, what happened) of every scenario
+    """
+    now, delay = m.now, m.delay
+    results = []
+
+    def run(*gens):
+        log = []
+        m.Simulation(*[gen(log) for gen in gens]).run(quiet=1)
+        results.append(log)
+
+    # processes interleave by time, the event engine keeps the
+    # order they were scheduled in at the same time
+    def ticker(name, step):
+        def gen(log):
+            for i in range(3):
+                yield delay(step)
+                log.append((now(), name))
+        return gen
+    run(ticker('a', 2), ticker('b', 3), ticker('c', 2))
+
+    # a yielded generator runs to completion before the caller goes on
+    def sub(log, cycles):
+        yield delay(cycles)
+        log.append((now(), 'sub done'))
+
+    def caller(log):
+        yield sub(log, 5)
+        log.append((now(), 'caller'))
+        yield delay(0)
+        log.append((now(), 'after delay(0)'))
+    run(caller)
+
+    # yield gen, delay(0) starts gen in the background
+    def spawner(log):
+        yield sub(log, 4), delay(0)
+        log.append((now(), 'spawned'))
+        yield delay(10)
+        log.append((now(), 'spawner done'))
+    run(spawner)
+
+    # the first clause of a tuple resumes the caller, the other one
+    # still finishes
+    def race(log):
+        yield sub(log, 7), delay(3)
+        log.append((now(), 'delay won'))
+        yield sub(log, 2), delay(9)
+        log.append((now(), 'generator won'))
+        yield delay(20)
+        log.append((now(), 'race done'))
+    run(race)
+
+    # run for a duration, then on to the end
+    def long(log):
+        for i in range(4):
+            yield delay(10)
+            log.append((now(), i))
+    log = []
+    simulation = m.Simulation(long(log))
+    log.append(('suspended', simulation.run(25, quiet=1), now()))
+    log.append(('finished', simulation.run(quiet=1)))
+    results.append(log)
+
+    return results
+
+
+class protocol(unittest.TestCase):
+
+    def test_event_engine(self):
+        interleave, nested, spawned, race, duration = scenarios(engine)
+        self.assertEqual(interleave, [(2, 'a'), (2, 'c'), (3, 'b'),
+                                      (4, 'a'), (4, 'c'), (6, 'b'),
+                                      (6, 'a'), (6, 'c'), (9, 'b')])
+        self.assertEqual(nested, [(5, 'sub done'), (5, 'caller'),
+                                  (5, 'after delay(0)')])
+        self.assertEqual(spawned, [(0, 'spawned'), (4, 'sub done'),
+                                   (10, 'spawner done')])
+        self.assertEqual(race, [(3, 'delay won'), (5, 'sub done'),
+                                (5, 'generator won'), (7, 'sub done'),
+                                (25, 'race done')])
+        self.assertEqual(duration, [(10, 0), (20, 1),
+                                    ('suspended', 1, 25), (30, 2), (40, 3),
+                                    ('finished', 0)])
+
+    @unittest.skipIf(myhdl is None, 'MyHDL is not installed')
+    def test_same_as_myhdl(self):
+        # same things at the same times, MyHDL has its own order for
+        # processes resumed at the same time
+        self.assertEqual([sorted(log) for log in scenarios(engine)],
+                         [sorted(log) for log in scenarios(myhdl)])
+
+    def test_bad_clauses(self):
+        self.assertRaises(TypeError, engine.delay, -1)
+
+        def bad():
+            yield 5
+        self.assertRaises(TypeError, engine.Simulation(bad()).run, quiet=1)
+
+
+class simulation(unittest.TestCase):
+
+    @unittest.skipIf(myhdl is None, 'MyHDL is not installed')
+    def test_same_as_myhdl(self):
+        # every stat of the hub model comes out the same on both,
+        # only the event engine counts its events
+        options = [{}, {'timing': 'bit'}, {'mshrs': 2, 'read_allocate': True},
+                   {'time_scale': 1000, 'banked': True}]
+        for i in (1, 2, 3):
+            trace = sim.load_trace(join(dirname(__file__),
+                                        'final_project_traffic_%d.csv' % i))
+            for kwargs in options:
+                results = [vars(sim.simulate(trace, sim.hierarchy(
+                    engine=name, **kwargs))) for name in ('event', 'myhdl')]
+                for result in results:
+                    result.pop('events')
+                    result['metrics'] = result['metrics'].summary()
+                self.assertEqual(results[0], results[1], (i, kwargs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+    Tests of the latency histograms
+
+    python -m unittest discover -s . -p 'test_*.py'
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from math import ceil
+from random import Random
+
+from metrics import histogram, metrics, PRECISION
+
+
+class buckets(unittest.TestCase):
+
+    def setUp(self):
+        self.h = histogram()
+
+    def test_small_values_are_exact(self):
+        for value in range(1 << PRECISION):
+            self.assertEqual(self.h.index(value), value)
+            self.assertEqual(self.h.highest(value), value)
+
+    def test_bucket_bounds(self):
+        # every value is in a bucket no lower than itself, and the
+        # bucket below ends before it
+        rng = Random(1)
+        values = [rng.randrange(1 << bits) for bits in range(1, 64)
+                  for i in range(50)]
+        values += [(1 << bits) + d for bits in range(PRECISION, 64)
+                   for d in (-1, 0, 1)]
+        for value in values:
+            i = self.h.index(value)
+            self.assertGreaterEqual(self.h.highest(i), value)
+            if i:
+                self.assertLess(self.h.highest(i - 1), value)
+
+    def test_indexes_fill_the_counts(self):
+        # no gaps between buckets, and the largest value has a bucket
+        self.assertEqual(self.h.index(self.h.highest(1000) + 1), 1001)
+        self.assertEqual(self.h.index((1 << 64) - 1),
+                         len(self.h.counts) - 1)
+
+    def test_bucket_width(self):
+        # above the exact values a bucket is within 1/2**(precision-1)
+        for i in range(1 << PRECISION, len(self.h.counts)):
+            low = self.h.highest(i - 1) + 1
+            width = self.h.highest(i) - low + 1
+            self.assertLessEqual(width*(1 << (PRECISION - 1)), low)
+
+
+class percentiles(unittest.TestCase):
+
+    def test_close_to_exact(self):
+        rng = Random(2)
+        values = [int(rng.expovariate(1e-5)) for i in range(5000)]
+        h = histogram()
+        for value in values:
+            h.record(value)
+        values.sort()
+        quantiles = (0.01, 0.5, 0.95, 0.99, 1.0)
+        for q, got in zip(quantiles, h.percentiles(quantiles)):
+            exact = values[int(ceil(q*len(values))) - 1]
+            self.assertGreaterEqual(got, exact)
+            self.assertLessEqual(got, exact + exact/(1 << (PRECISION - 1)))
+        self.assertEqual(h.percentiles((1.0,)), [max(values)])
+
+    def test_summary(self):
+        h = histogram()
+        self.assertEqual(h.percentiles(), [0, 0, 0])
+        h.record(3, count=2)
+        h.record(1000)
+        self.assertEqual((h.count, h.total, h.min, h.max), (3, 1006, 3, 1000))
+        self.assertAlmostEqual(h.mean(), 1006/3.0)
+
+    def test_merge(self):
+        a, b, both = histogram(), histogram(), histogram()
+        for value in range(0, 100000, 7):
+            (a if value % 2 else b).record(value)
+            both.record(value)
+        a.merge(b)
+        self.assertEqual(a.counts, both.counts)
+        self.assertEqual((a.count, a.total, a.min, a.max),
+                         (both.count, both.total, both.min, both.max))
+        self.assertRaises(ValueError, a.merge, histogram(precision=4))
+
+
+class exports(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.m = metrics(1e-8)
+        self.m.record(100, 1, 'send', 'L1', 'hit')
+        self.m.record(300, 1, 'send', 'L1', 'hit')
+        self.m.record(5000, 2, 'request', 'L2', 'miss')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_by(self):
+        by_op = self.m.by('op')
+        self.assertEqual(sorted(by_op), [('request',), ('send',)])
+        self.assertEqual(by_op[('send',)].count, 2)
+        self.assertEqual(self.m.by()[()].count, 3)
+
+    def test_summary_in_seconds(self):
+        rows = self.m.summary()
+        self.assertEqual([row['device'] for row in rows], [1, 2])
+        self.assertEqual(rows[0]['count'], 2)
+        self.assertAlmostEqual(rows[0]['sum'], 400e-8)
+        self.assertAlmostEqual(rows[0]['max'], 300e-8)
+        self.assertAlmostEqual(rows[1]['p50'], 5000e-8, delta=5000e-8/128)
+
+    def test_formats(self):
+        # format picked by the extension
+        for fname in ('m.csv', 'm.json', 'm.prom'):
+            self.m.write(os.path.join(self.dir, fname))
+        with open(os.path.join(self.dir, 'm.csv')) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('1,send,L1,hit,2,'))
+
+        with open(os.path.join(self.dir, 'm.json')) as f:
+            data = json.load(f)
+        self.assertEqual(data['unit'], 'seconds')
+        counts = sum(count for row in data['histograms']
+                     for value, count in row['buckets'])
+        self.assertEqual(counts, 3)
+
+        with open(os.path.join(self.dir, 'm.prom')) as f:
+            text = f.read()
+        self.assertIn('hub_latency_seconds_count{device="2",op="request",'
+                      'level="L2",result="miss"} 1', text)
+        self.assertIn('# TYPE hub_latency_seconds_max gauge', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+    Tests of the replacement policies
+
+    python -m unittest discover -s . -p 'test_*.py'
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+import unittest
+from random import Random
+
+from policies import POLICIES, FIFO, LRU, LFU, ARC, TwoQ, RandomPolicy, \
+    make_policy
+
+
+def fill(policy, tags):
+    """ Insert tags into a policy, returns the policy """
+    for tag in tags:
+        policy.insert(tag)
+    return policy
+
+
+class orders(unittest.TestCase):
+
+    def test_fifo(self):
+        p = fill(FIFO(3), [1, 2, 3])
+        p.touch(1)
+        self.assertEqual(p.victim(4), 1)
+        self.assertEqual(p.victim(5), 2)
+
+    def test_lru(self):
+        p = fill(LRU(3), [1, 2, 3])
+        p.touch(1)
+        self.assertEqual(p.victim(4), 2)
+        self.assertEqual(p.victim(5), 3)
+        self.assertEqual(p.victim(6), 1)
+
+    def test_lfu_ties(self):
+        # least used first, least recently used among equals
+        p = fill(LFU(4), [1, 2, 3, 4])
+        p.touch(3)
+        p.touch(1)
+        p.touch(1)
+        self.assertEqual(p.victim(5), 2)
+        self.assertEqual(p.victim(5), 4)
+        self.assertEqual(p.victim(5), 3)
+        self.assertEqual(p.victim(5), 1)
+
+    def test_lfu_brute_force(self):
+        # victims of a brute force LFU, (count, last use) is smallest,
+        # with removals emptying the smallest bucket on the way
+        for seed in range(50):
+            rng = Random(seed)
+            p = LFU(8)
+            uses = {}
+            for step in range(300):
+                op = rng.random()
+                if op < 0.3 and len(uses) < 8:
+                    tag = rng.randrange(30)
+                    if tag not in uses:
+                        p.insert(tag)
+                        uses[tag] = (1, step)
+                elif op < 0.7 and uses:
+                    tag = rng.choice(sorted(uses))
+                    p.touch(tag)
+                    uses[tag] = (uses[tag][0] + 1, step)
+                elif op < 0.85 and uses:
+                    tag = rng.choice(sorted(uses))
+                    p.remove(tag)
+                    del uses[tag]
+                elif uses:
+                    expected = min(uses, key=uses.get)
+                    self.assertEqual(p.victim(), expected)
+                    del uses[expected]
+
+    def test_arc_keeps_reused_lines(self):
+        # a scan of one time tags churns T1 only
+        p = fill(ARC(4), [1, 2])
+        p.touch(1)
+        p.touch(2)
+        for tag in range(10, 20):
+            if len(p.t1) + len(p.t2) == 4:
+                self.assertNotIn(p.victim(tag), (1, 2))
+            p.insert(tag)
+        self.assertEqual(sorted(p.t2), [1, 2])
+
+    def test_2q_promotes_returning_lines(self):
+        p = fill(TwoQ(4), [1, 2, 3, 4])
+
+        # 1 goes to A1out, coming back puts it in Am
+        self.assertEqual(p.victim(5), 1)
+        p.insert(5)
+        self.assertEqual(p.victim(1), 2)
+        p.insert(1)
+        self.assertIn(1, p.am)
+
+    def test_random_is_seeded(self):
+        def victims(seed):
+            p = fill(RandomPolicy(8, seed), range(8))
+            return [p.victim() for i in range(8)]
+        self.assertEqual(victims(1), victims(1))
+        self.assertNotEqual(victims(1), victims(2))
+        self.assertEqual(sorted(victims(1)), range(8))
+
+
+class protocol(unittest.TestCase):
+
+    def test_remove(self):
+        # removed tags are never victims, unknown tags are ignored
+        for name in POLICIES:
+            p = fill(make_policy(name, 4, seed=0), [1, 2, 3, 4])
+            p.remove(2)
+            p.remove(99)
+            p.insert(5)
+            victims = [p.victim(6 + i) for i in range(4)]
+            self.assertEqual(sorted(victims), [1, 3, 4, 5], name)
+
+    def test_bogus_name(self):
+        self.assertIsInstance(make_policy('nope', 4), FIFO)
+        self.assertIsInstance(make_policy('lru', 4), LRU)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+    Tests of the hub model
+
+    python -m unittest discover -s . -p 'test_*.py'
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+import unittest
+
+import sim
+from tracefile import DTYPE
+
+
+def trace(rows):
+    """ Structured array of (time, device, op, ts, tag) rows """
+    return np.array(rows, dtype=DTYPE)
+
+
+class banks(unittest.TestCase):
+
+    def test_capacity_split(self):
+        # leftover lines go to the first banks
+        c = sim.cache(max_capacity=10, banks=4)
+        self.assertEqual(c.bank_capacity, [3, 3, 2, 2])
+
+    def test_more_banks_than_lines(self):
+        self.assertRaises(ValueError, sim.cache, max_capacity=3, banks=4)
+
+    def test_parallel_reads(self):
+        # fill the 10 lines of L2, then a burst of reads that spread
+        # over the banks, all arriving at once
+        rows = [(0, 1, 0, 1024, tag) for tag in range(10)]
+        rows += [(1, 1 + tag % 3, 1, 1024, tag)
+                 for r in range(5) for tag in range(10)]
+        results = [sim.simulate(trace(rows), sim.hierarchy(banked=banked,
+                                                           time_scale=1))
+                   for banked in (False, True)]
+        one, banked = results
+
+        # same hits, but the banks read out at the same time
+        self.assertEqual((one.l2_hits, one.l2_misses),
+                         (banked.l2_hits, banked.l2_misses))
+        self.assertLess(banked.time, one.time/2)
+        self.assertLess(banked.queue_delay, one.queue_delay/2)
+        for device in one.device_latency:
+            self.assertLess(banked.device_latency[device][1],
+                            one.device_latency[device][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
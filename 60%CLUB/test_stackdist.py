@@ -0,0 +1,81 @@
+"""
+    Tests of the stack distance analysis, against brute force
+
+    python -m unittest discover -s . -p 'test_*.py'
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+import unittest
+from random import Random
+
+from stackdist import stack_distances, hit_counts, analyze
+
+
+def brute_distances(tags):
+    """ Distinct tags since the last access to the same tag, -1 if none """
+    dist = []
+    for i, tag in enumerate(tags):
+        before = tags[:i]
+        if tag not in before:
+            dist.append(-1)
+            continue
+        last = len(before) - 1 - before[::-1].index(tag)
+        dist.append(len(set(tags[last + 1:i])))
+    return dist
+
+
+def lru_hits(tags, lines):
+    """ Hits of an LRU cache of the given number of lines """
+    stack = []
+    hits = 0
+    for tag in tags:
+        if tag in stack:
+            hits += 1
+            stack.remove(tag)
+        elif len(stack) == lines:
+            stack.pop(0)
+        stack.append(tag)
+    return hits
+
+
+class stackdist(unittest.TestCase):
+
+    def setUp(self):
+        # random traces with a few hot tags so there is reuse
+        rng = Random(485)
+        self.traces = [[rng.randrange(rng.choice((3, 10, 40)))
+                        for i in range(rng.randrange(1, 200))]
+                       for t in range(20)]
+
+    def test_distances(self):
+        self.assertEqual(stack_distances([5, 6, 5, 7, 6, 6]).tolist(),
+                         [-1, -1, 1, -1, 2, 0])
+        for tags in self.traces:
+            self.assertEqual(stack_distances(tags).tolist(),
+                             brute_distances(tags))
+
+    def test_hits_per_capacity(self):
+        for tags in self.traces:
+            hits = hit_counts(stack_distances(tags), 12)
+            self.assertEqual(hits.tolist(),
+                             [lru_hits(tags, c) for c in range(1, 13)])
+
+    def test_streams(self):
+        # small transactions go to L1, big ones to L2
+        ts = np.array([128, 1024, 128, 1024, 128, 129])
+        tag = np.array([1, 1, 2, 1, 1, 2])
+        result, max_lines = analyze(ts, tag)
+        self.assertEqual(max_lines, 2)
+        self.assertEqual(result['L1'][0], 3)
+        self.assertEqual(result['L1'][1].tolist(), [0, 1])
+        self.assertEqual(result['L2'][0], 3)
+        self.assertEqual(result['L2'][1].tolist(), [1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
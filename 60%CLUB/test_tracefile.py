@@ -0,0 +1,115 @@
+"""
+    Tests of the traffic file reader and binary trace files
+
+    python -m unittest discover -s . -p 'test_*.py'
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import tracefile
+from tracefile import DTYPE, read_csv, load, write_binary, is_binary, \
+    open_binary, open_trace, transactions
+
+
+# a bit of everything: comments, blanks, spaces and big values
+ROWS = [(0, 1, 0, 128, 1), (5, 2, 1, 1024, 0xffffffff),
+        (2**40, 255, 0, 65535, 7), (7, 3, 1, 4, 0)]
+TEXT = '#time,device,op,ts,tag\n0,1,0,128,1\n\n5, 2, 1, 1024, 4294967295\n' \
+       '# comment\n1099511627776,255,0,65535,7\n7,3,1,4,0\n'
+
+
+class traces(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, text, name='t.csv'):
+        """ Write a file in the temporary directory, returns its name """
+        fname = os.path.join(self.dir, name)
+        with open(fname, 'wb') as f:
+            f.write(text)
+        return fname
+
+    def test_line_endings(self):
+        expected = np.array(ROWS, dtype=DTYPE)
+        for ending in ('\n', '\r', '\r\n'):
+            trace = load(self.write(TEXT.replace('\n', ending)))
+            self.assertEqual(trace.tolist(), expected.tolist())
+
+    def test_chunks(self):
+        # chunks are split by rows, lines split between blocks join up
+        text = ''.join('%d,1,0,128,%d\r\n' % (i, i) for i in range(1000))
+        fname = self.write(text)
+        old = tracefile.BLOCK_SIZE
+        tracefile.BLOCK_SIZE = 77
+        try:
+            chunks = list(read_csv(fname, chunk_size=300))
+        finally:
+            tracefile.BLOCK_SIZE = old
+        self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+        self.assertEqual(np.concatenate(chunks)['tag'].tolist(), range(1000))
+
+    def test_binary_round_trip(self):
+        csv = self.write(TEXT)
+        trc = os.path.join(self.dir, 't.trc')
+        self.assertEqual(write_binary(read_csv(csv, chunk_size=2), trc), 4)
+        self.assertTrue(is_binary(trc))
+        self.assertFalse(is_binary(csv))
+        self.assertEqual(os.path.getsize(trc), 16 + 16*len(ROWS))
+
+        trace = open_trace(trc)
+        self.assertIsInstance(trace, np.memmap)
+        self.assertEqual(trace.tolist(), load(csv).tolist())
+        self.assertEqual(list(transactions(trace)),
+                         list(transactions(open_trace(csv))))
+
+    def test_empty(self):
+        csv = self.write('# nothing\n')
+        self.assertEqual(len(load(csv)), 0)
+        trc = os.path.join(self.dir, 'e.trc')
+        self.assertEqual(write_binary(read_csv(csv), trc), 0)
+        self.assertEqual(len(open_binary(trc)), 0)
+
+    def test_bad_binary(self):
+        fname = self.write(tracefile.HEADER.pack(tracefile.MAGIC, 9, 0))
+        self.assertRaises(ValueError, open_binary, fname)
+
+    def test_transactions(self):
+        rows = list(transactions(np.array(ROWS, dtype=DTYPE)))
+        self.assertEqual(rows, ROWS)
+        self.assertEqual(hex(rows[0][4]), '0x1')
+
+
+class bad_rows(unittest.TestCase):
+
+    def test_columns(self):
+        # a short row next to a long one used to add up to ten values
+        for lines in (['1,2,0,128', '1,2,0,128,5,6'], ['1,2,0,128,5,'],
+                      ['1,2,0,128,5,6']):
+            self.assertRaises(ValueError, tracefile.parse, lines)
+
+    def test_not_integers(self):
+        for value in ('1.5', '', 'x', '0x10', '-1'):
+            self.assertRaises(ValueError, tracefile.parse,
+                              ['1,2,0,128,5', '1,2,0,%s,5' % value])
+
+    def test_out_of_range(self):
+        for row in ('1,256,0,128,5', '1,2,256,128,5', '1,2,0,65536,5',
+                    '1,2,0,128,4294967296'):
+            self.assertRaises(ValueError, tracefile.parse, [row])
+
+
+if __name__ == '__main__':
+    unittest.main()
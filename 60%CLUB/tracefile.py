@@ -0,0 +1,287 @@
+"""
+    Traffic file reader
+
+    Traffic files are CSV files with five columns: time, device,
+    operation (0 SEND, 1 REQUEST), transaction size and tag. Lines
+    starting with # are comments. The files handed out for the project
+    use bare \\r line endings, so \\r, \\n and \\r\\n are all accepted.
+
+    read_csv() streams a file in chunks of a fixed number of rows, so
+    memory stays the same no matter how long the trace is. Every chunk
+    is a NumPy structured array with one record per transaction:
+
+        time    uint64  time of the transaction
+        device  uint8   device ID
+        op      uint8   operation, 0 SEND, 1 REQUEST
+        ts      uint16  transaction size in bytes
+        tag     uint32  tag
+
+    The same records can be stored in a compact binary trace file,
+    16 bytes per transaction after a 16 byte header:
+
+        magic   6 bytes 'HUBTRC'
+        version uint16  format version, currently 1
+        rows    uint64  number of transactions
+
+    all little endian. open_trace() memory maps binary trace files,
+    so they load instantly and processes reading the same file share
+    one page cached copy. To convert a traffic file:
+
+        python tracefile.py final_project_traffic_1.csv traffic_1.trc
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+# used for the binary trace header
+import struct
+
+# use argparse package, parses command line arguments
+import argparse
+
+
+""" record layout of a transaction """
+DTYPE = np.dtype([('time', '<u8'), ('device', 'u1'), ('op', 'u1'),
+                  ('ts', '<u2'), ('tag', '<u4')])
+
+# columns of the CSV file, in order
+FIELDS = DTYPE.names
+
+# characters of the CSV rows, the columns are unsigned integers
+NUMBERS = '0123456789, \t'
+
+# rows per chunk
+CHUNK_SIZE = 65536
+
+# bytes read from the file at a time
+BLOCK_SIZE = 1 << 20
+
+# binary trace header
+MAGIC = 'HUBTRC'
+VERSION = 1
+HEADER = struct.Struct('<6sHQ')
+
+
+def parse(lines):
+    """
+        Turn CSV lines into a chunk of transactions
+
+        :param input lines: list of lines, without comments or blanks
+    """
+
+    # every row needs all of the columns, a short row next to a long
+    # one would still add up to the right number of values
+    commas = len(FIELDS) - 1
+    for line in lines:
+        if line.count(',') != commas:
+            raise ValueError('traffic file rows must have %d integer '
+                             'columns: %r' % (len(FIELDS), line))
+
+    # only unsigned integers, so NumPy never stops at something it
+    # can't parse and leaves the rest out
+    text = ','.join(lines)
+    if text.translate(None, NUMBERS):
+        raise ValueError('traffic file rows must have %d integer columns'
+                         % len(FIELDS))
+
+    # let NumPy parse all the numbers in one go
+    values = np.fromstring(text, dtype=np.int64, sep=',')
+    if values.size != len(FIELDS)*len(lines):
+        raise ValueError('traffic file rows must have %d integer columns'
+                         % len(FIELDS))
+    values = values.reshape(-1, len(FIELDS))
+
+    # fill the records, making sure every value fits its field
+    chunk = np.empty(len(lines), dtype=DTYPE)
+    for k, name in enumerate(FIELDS):
+        column = values[:, k]
+        limit = np.iinfo(DTYPE[name])
+        if column.min() < limit.min or column.max() > limit.max:
+            raise ValueError('%s out of range in traffic file' % name)
+        chunk[name] = column
+    return chunk
+
+
+def read_csv(fname, chunk_size=CHUNK_SIZE):
+    """
+        Stream a traffic file, yields chunks of transactions
+
+        :param input fname: filename of the csv file
+        :param input chunk_size: maximum number of rows per chunk
+    """
+    with open(fname, 'rb') as f:
+
+        # end of the last block, may be a partial line
+        rest = ''
+
+        # lines read but not parsed yet
+        pending = []
+
+        while True:
+            block = f.read(BLOCK_SIZE)
+
+            # treat any line ending as \n, a \r\n split between two
+            # blocks just turns into an extra blank line
+            text = (rest + block).replace('\r\n', '\n').replace('\r', '\n')
+            lines = text.split('\n')
+
+            # last line may continue in the next block
+            rest = lines.pop() if block else ''
+
+            # skip blank lines and comments like the # header
+            for line in lines:
+                line = line.strip()
+                if line and line[0] != '#':
+                    pending.append(line)
+
+            # hand out full chunks
+            while len(pending) >= chunk_size:
+                yield parse(pending[:chunk_size])
+                del pending[:chunk_size]
+
+            if not block:
+                break
+
+        # whatever is left over
+        if pending:
+            yield parse(pending)
+
+
+def load(fname):
+    """
+        Read a whole trace into one structured array
+
+        Binary trace files are memory mapped instead of read.
+
+        :param input fname: filename of the trace
+    """
+    if is_binary(fname):
+        return open_binary(fname)
+
+    chunks = list(read_csv(fname))
+    if not chunks:
+        return np.empty(0, dtype=DTYPE)
+    return np.concatenate(chunks)
+
+
+def write_binary(chunks, fname):
+    """
+        Write transactions to a binary trace file
+
+        Returns the number of transactions written
+
+        :param input chunks: iterable of chunks, such as read_csv()
+        :param input fname: filename of the binary trace file
+    """
+    rows = 0
+    with open(fname, 'wb') as f:
+
+        # room for the header, the row count is known at the end
+        f.write(HEADER.pack(MAGIC, VERSION, 0))
+
+        # records go straight from the chunks to the file
+        for chunk in chunks:
+            f.write(np.ascontiguousarray(chunk, dtype=DTYPE).tobytes())
+            rows += len(chunk)
+
+        # now fill in the header
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, rows))
+    return rows
+
+
+def is_binary(fname):
+    """
+        Check for the binary trace magic at the start of a file
+
+        :param input fname: filename of the trace
+    """
+    with open(fname, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def open_binary(fname):
+    """
+        Memory map a binary trace file
+
+        Returns a read only structured array backed by the file
+
+        :param input fname: filename of the binary trace file
+    """
+    with open(fname, 'rb') as f:
+        magic, version, rows = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError('%s is not a binary trace file' % fname)
+    if version != VERSION:
+        raise ValueError('%s has binary trace version %s, expected %s'
+                         % (fname, version, VERSION))
+
+    # memmap can't map zero rows
+    if not rows:
+        return np.empty(0, dtype=DTYPE)
+    return np.memmap(fname, dtype=DTYPE, mode='r', offset=HEADER.size,
+                     shape=(rows,))
+
+
+def open_trace(fname):
+    """
+        Open a trace for streaming, binary or CSV
+
+        Binary trace files are memory mapped, traffic files are
+        read in chunks.
+
+        :param input fname: filename of the trace
+    """
+    if is_binary(fname):
+        return open_binary(fname)
+    return read_csv(fname)
+
+
+def transactions(trace):
+    """
+        Go through the transactions of a trace one at a time
+
+        Yields (time, device, op, ts, tag) tuples of plain integers.
+
+        :param input trace: structured array of transactions, or an
+                            iterable of chunks such as read_csv()
+    """
+
+    # go through a single array, which may be memory mapped,
+    # a chunk at a time
+    if isinstance(trace, np.ndarray):
+        chunks = (trace[i:i + CHUNK_SIZE]
+                  for i in xrange(0, len(trace), CHUNK_SIZE))
+    else:
+        chunks = trace
+
+    # tolist() gives longs for the unsigned columns, the tag is made
+    # an int so hex(tag) reads 0x1 and not 0x1L
+    for chunk in chunks:
+        for t, device, op, ts, tag in chunk.tolist():
+            yield t, device, op, ts, int(tag)
+
+
+if __name__ == '__main__':
+
+    # initialize argument parser
+    parser = argparse.ArgumentParser(
+        description='convert a traffic file to a binary trace file')
+
+    # arguments for the input and output filenames
+    parser.add_argument('csv',
+                        help='traffic file to convert'
+                        )
+    parser.add_argument('trc',
+                        help='binary trace file to write'
+                        )
+
+    # parse the arguments
+    arguments = parser.parse_args()
+
+    # stream from one to the other
+    rows = write_binary(read_csv(arguments.csv), arguments.trc)
+    print 'Wrote %d transactions to %s' % (rows, arguments.trc)
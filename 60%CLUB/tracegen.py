@@ -0,0 +1,334 @@
+"""
+    Synthetic traffic file generator
+
+    Makes traces in the format of the project's traffic files with as
+    many transactions as needed, to see how the hub model scales. The
+    trace is made a chunk at a time, so memory stays the same no
+    matter how many rows are asked for, and it is written as a CSV
+    traffic file or straight to a binary trace file (see tracefile.py).
+
+    What can be set:
+
+        devices     number of devices, IDs 1 .. N, each transaction
+                    comes from one picked at random
+        requests    fraction of transactions that are REQUESTs, the
+                    rest are SENDs
+        sizes       transaction size mix, like 128:4,1024:1. Every tag
+                    gets one size from the mix, so SENDs and REQUESTs
+                    of a tag go to the same cache level
+        tags        tags 1 .. N and how popular they are:
+                      uniform  every tag as likely
+                      zipf     the k-th most popular tag is used in
+                               proportion to 1/k**s
+                      hotset   a fraction of the tags gets most of the
+                               accesses, and the hot set moves on to
+                               other tags every so many transactions
+        arrivals    time between transactions:
+                      fixed    always the mean interval
+                      poisson  exponential, mean interval
+                      bursty   Pareto (heavy tailed), mean interval
+        seed        same seed, same trace
+
+    REQUESTs are for tags picked the same way as SENDs, so some of
+    them are for tags nobody sent yet (the data center answers not
+    found).
+
+        python tracegen.py -n 1000000 --popularity zipf -o big.trc
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+# use argparse package, parses command line arguments
+import argparse
+
+# record layout and binary trace writer
+from tracefile import DTYPE, CHUNK_SIZE, write_binary
+
+
+# header of the project's traffic files
+HEADER = '# [0]time, [1]device, [2]operation, [3]ts, [4]tr_data_tag\n'
+
+# Pareto shape for bursty arrivals, mean is finite above 1
+PARETO_SHAPE = 1.5
+
+# transaction sizes the hub can take, in bytes: a line needs at least
+# one word of data and the size has to fit the u2 field of the trace
+MIN_SIZE = 4
+MAX_SIZE = 65535
+
+
+def parse_sizes(text):
+    """
+        Turn a size mix like '128:4,1024:1' into (sizes, weights)
+
+        A size without a weight gets weight 1. Raises ValueError for
+        sizes outside MIN_SIZE to MAX_SIZE or weights that aren't positive.
+
+        :param input text: comma separated size:weight pairs
+    """
+    sizes = []
+    weights = []
+    for item in text.split(','):
+        size, _, weight = item.partition(':')
+        size = int(size)
+        if not MIN_SIZE <= size <= MAX_SIZE:
+            raise ValueError('size %d is not between %d and %d bytes'
+                             % (size, MIN_SIZE, MAX_SIZE))
+        sizes.append(size)
+        weights.append(float(weight) if weight else 1.0)
+    weights = np.array(weights)
+    if (weights < 0).any() or not weights.sum():
+        raise ValueError('size weights must be positive')
+    return np.array(sizes), weights/weights.sum()
+
+
+def generate(rows, devices=3, requests=0.3, sizes=((128, 512, 1024, 1014),
+             (0.4, 0.2, 0.3, 0.1)), tags=1000, popularity='uniform', zipf_s=1.0,
+             hot_fraction=0.1, hot_weight=0.9, hot_shift=10000,
+             arrivals='poisson', interval=100, seed=0, chunk_size=CHUNK_SIZE):
+    """
+        Make a synthetic trace, yields chunks of transactions
+
+        The chunks are structured arrays like read_csv() gives.
+
+        :param input rows: number of transactions
+        :param input devices: number of devices
+        :param input requests: fraction of REQUESTs
+        :param input sizes: (sizes, weights) of the transaction size mix
+        :param input tags: number of tags
+        :param input popularity: 'uniform', 'zipf' or 'hotset'
+        :param input zipf_s: exponent of the Zipf popularity
+        :param input hot_fraction: fraction of the tags that is hot
+        :param input hot_weight: fraction of accesses to the hot set
+        :param input hot_shift: transactions before the hot set moves
+        :param input arrivals: 'fixed', 'poisson' or 'bursty'
+        :param input interval: mean time between transactions
+        :param input seed: seed of the random numbers
+        :param input chunk_size: rows per chunk
+    """
+    rng = np.random.RandomState(seed)
+
+    # size of every tag, index 0 is unused
+    size_values, size_weights = sizes
+    tag_size = rng.choice(size_values, size=tags + 1, p=size_weights)
+
+    # zipf, cumulative probability of the popularity ranks, and which
+    # tag has each rank so the popular tags are spread out
+    if popularity == 'zipf':
+        cdf = np.cumsum(1.0/np.arange(1, tags + 1)**zipf_s)
+        cdf /= cdf[-1]
+        rank_tag = rng.permutation(tags) + 1
+
+    # hot set size
+    hot = max(1, int(tags*hot_fraction))
+
+    # time of the last transaction so far
+    time = 0
+
+    for first in xrange(0, rows, chunk_size):
+        n = min(chunk_size, rows - first)
+        chunk = np.empty(n, dtype=DTYPE)
+
+        # time between transactions, the first one is at 0
+        if arrivals == 'fixed':
+            gap = np.empty(n)
+            gap.fill(interval)
+        elif arrivals == 'bursty':
+            scale = interval*(PARETO_SHAPE - 1)/PARETO_SHAPE
+            gap = (rng.pareto(PARETO_SHAPE, n) + 1)*scale
+        else:
+            gap = rng.exponential(interval, n)
+        gap = np.rint(gap).astype(np.int64)
+        if first == 0:
+            gap[0] = 0
+        t = time + np.cumsum(gap)
+        time = int(t[-1])
+        chunk['time'] = t
+
+        # device and operation
+        chunk['device'] = rng.randint(1, devices + 1, n)
+        chunk['op'] = rng.random_sample(n) < requests
+
+        # tag
+        if popularity == 'zipf':
+            tag = rank_tag[np.searchsorted(cdf, rng.random_sample(n))]
+        elif popularity == 'hotset':
+
+            # the hot set is the next hot tags every hot_shift rows
+            row = first + np.arange(n)
+            start = (row//hot_shift)*hot
+            hit = rng.random_sample(n) < hot_weight
+            tag = np.where(hit, (start + rng.randint(0, hot, n)) % tags,
+                           rng.randint(0, tags, n)) + 1
+        else:
+            tag = rng.randint(1, tags + 1, n)
+        chunk['tag'] = tag
+        chunk['ts'] = tag_size[tag]
+
+        yield chunk
+
+
+def write_csv(chunks, fname):
+    """
+        Write transactions to a traffic file
+
+        Returns the number of transactions written
+
+        :param input chunks: iterable of chunks, such as generate()
+        :param input fname: filename of the csv file
+    """
+    rows = 0
+    with open(fname, 'w') as f:
+        f.write(HEADER)
+        for chunk in chunks:
+            f.write(''.join(['%d,%d,%d,%d,%d\n' % row for row in chunk.tolist()]))
+            rows += len(chunk)
+    return rows
+
+
+if __name__ == '__main__':
+
+    # initialize argument parser
+    parser = argparse.ArgumentParser(
+        description='make a synthetic traffic file')
+
+    # argument for the output file
+    parser.add_argument('-o',
+                        action='store',
+                        dest='output',
+                        required=True,
+                        help='file to write, a binary trace file if it '
+                             'ends in .trc, else a traffic file'
+                        )
+    parser.add_argument('--format',
+                        action='store',
+                        dest='format',
+                        choices=['csv', 'binary'],
+                        help='format of the file, overrides the extension'
+                        )
+
+    # arguments for what goes in the trace
+    parser.add_argument('-n', '--rows',
+                        action='store',
+                        dest='rows',
+                        type=int,
+                        default=100000,
+                        help='number of transactions'
+                        )
+    parser.add_argument('-d', '--devices',
+                        action='store',
+                        dest='devices',
+                        type=int,
+                        default=3,
+                        help='number of devices'
+                        )
+    parser.add_argument('-r', '--requests',
+                        action='store',
+                        dest='requests',
+                        type=float,
+                        default=0.3,
+                        help='fraction of transactions that are REQUESTs'
+                        )
+    parser.add_argument('--sizes',
+                        action='store',
+                        dest='sizes',
+                        default='128:4,512:2,1024:3,1014:1',
+                        help='transaction size mix, size:weight pairs'
+                        )
+    parser.add_argument('-t', '--tags',
+                        action='store',
+                        dest='tags',
+                        type=int,
+                        default=1000,
+                        help='number of tags'
+                        )
+    parser.add_argument('-p', '--popularity',
+                        action='store',
+                        dest='popularity',
+                        choices=['uniform', 'zipf', 'hotset'],
+                        default='uniform',
+                        help='how popular the tags are'
+                        )
+    parser.add_argument('--zipf-s',
+                        action='store',
+                        dest='zipf_s',
+                        type=float,
+                        default=1.0,
+                        help='exponent of the Zipf popularity'
+                        )
+    parser.add_argument('--hot-fraction',
+                        action='store',
+                        dest='hot_fraction',
+                        type=float,
+                        default=0.1,
+                        help='fraction of the tags in the hot set'
+                        )
+    parser.add_argument('--hot-weight',
+                        action='store',
+                        dest='hot_weight',
+                        type=float,
+                        default=0.9,
+                        help='fraction of transactions to the hot set'
+                        )
+    parser.add_argument('--hot-shift',
+                        action='store',
+                        dest='hot_shift',
+                        type=int,
+                        default=10000,
+                        help='transactions before the hot set moves'
+                        )
+    parser.add_argument('-a', '--arrivals',
+                        action='store',
+                        dest='arrivals',
+                        choices=['fixed', 'poisson', 'bursty'],
+                        default='poisson',
+                        help='time between transactions'
+                        )
+    parser.add_argument('-i', '--interval',
+                        action='store',
+                        dest='interval',
+                        type=float,
+                        default=100,
+                        help='mean time between transactions'
+                        )
+    parser.add_argument('-s', '--seed',
+                        action='store',
+                        dest='seed',
+                        type=int,
+                        default=0,
+                        help='seed of the random numbers'
+                        )
+
+    # parse the arguments
+    arguments = parser.parse_args()
+
+    # check the numbers make sense
+    if arguments.rows < 0 or arguments.devices < 1 or arguments.tags < 1 \
+            or arguments.devices > 255:
+        parser.error('need rows >= 0, 1 to 255 devices and at least one tag')
+    if not 0 <= arguments.requests <= 1:
+        parser.error('--requests must be between 0 and 1')
+    try:
+        sizes = parse_sizes(arguments.sizes)
+    except ValueError as e:
+        parser.error('--sizes must be size:weight pairs like 128:4,1024:1 (%s)' % e)
+
+    chunks = generate(arguments.rows, arguments.devices, arguments.requests,
+                      sizes, arguments.tags, arguments.popularity,
+                      arguments.zipf_s, arguments.hot_fraction,
+                      arguments.hot_weight, arguments.hot_shift,
+                      arguments.arrivals, arguments.interval, arguments.seed)
+
+    # binary or csv
+    fmt = arguments.format
+    if fmt is None:
+        fmt = 'binary' if arguments.output.endswith('.trc') else 'csv'
+    if fmt == 'binary':
+        rows = write_binary(chunks, arguments.output)
+    else:
+        rows = write_csv(chunks, arguments.output)
+    print 'Wrote %d transactions to %s' % (rows, arguments.output)
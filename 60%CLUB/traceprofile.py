@@ -0,0 +1,437 @@
+"""
+    Profile of a traffic file, without simulating it
+
+    Everything is worked out on the columns of the trace with NumPy,
+    so traces with millions of transactions take seconds:
+
+        devices       transactions, SENDs, REQUESTs and bytes per device
+        size classes  the same split at 128 bytes the hub uses for
+                      L1 and L2, plus distinct tags per class
+        sizes         transactions of every size
+        reuse         reuse distance of every access in the L1 and L2
+                      streams: accesses since the last access to the
+                      same tag, in power of two buckets, plus the
+                      first accesses (cold)
+        working set   distinct tags and their bytes in a window of
+                      trace time that slides along the trace
+        inter-arrival time between transactions, overall and per
+                      device, in power of two buckets
+
+    With --tags every tag also gets a row with its accesses, reuses,
+    mean reuse distance and bytes.
+
+    stackdist.py gives the LRU hit/miss counts for every capacity.
+    The result is printed and can be saved as CSV (section, group,
+    key, value rows) or JSON:
+
+        python traceprofile.py -f final_project_traffic_1.csv -o profile.json
+
+    Project Team:  Sixty Percent Club
+    ECE485 Final Project
+"""
+
+# use numpy package, give it alias np
+import numpy as np
+
+# use argparse package, parses command line arguments
+import argparse
+
+# for writing the profile as JSON
+import json
+
+# import isfile function to make sure
+# the trace file provided exists
+from os.path import isfile
+
+# traffic file and binary trace loading
+from tracefile import load
+
+
+# biggest transaction that goes to L1, like the hub
+L1_MAX = 128
+
+# windows in the working set series when no window is given
+WINDOWS = 100
+
+# steps per window when no step is given
+STEPS = 10
+
+
+def log2_histogram(x):
+    """
+        Histogram of non-negative integers in power of two buckets
+
+        Returns a list of (lowest value in bucket, count) for the
+        buckets that aren't empty. The buckets are 0, 1, 2-3, 4-7, ...
+
+        :param input x: array of non-negative integers
+    """
+    if not len(x):
+        return []
+
+    # frexp gives the exponent e with x = m*2**e and 0.5 <= m < 1,
+    # so 0 for 0, 1 for 1, 2 for 2-3 and so on
+    bucket = np.frexp(np.asarray(x, dtype=np.float64))[1]
+    counts = np.bincount(bucket)
+    return [(0 if b == 0 else 1 << (b - 1), int(n))
+            for b, n in enumerate(counts.tolist()) if n]
+
+
+def reuse_distances(tags):
+    """
+        Reuse distance of every access
+
+        Returns an array with the number of accesses since the last
+        access to the same tag (1 for back to back), -1 for the
+        first access to a tag.
+
+        :param input tags: array of tags in access order
+    """
+    n = len(tags)
+    dist = np.empty(n, dtype=np.int64)
+    dist.fill(-1)
+    if n < 2:
+        return dist
+
+    # stable sort, the accesses of a tag stay in order
+    order = np.argsort(tags, kind='mergesort')
+    same = tags[order][1:] == tags[order][:-1]
+
+    # distance between neighbours of the same tag
+    dist[order[1:][same]] = np.diff(order)[same]
+    return dist
+
+
+def working_set(time, tags, ts, window, step):
+    """
+        Distinct tags and their bytes in a sliding window
+
+        The window is a whole number of steps and slides one step at
+        a time. A tag counts from the step it is used in until the
+        window has slid past it, so every (tag, step) pair adds one
+        interval and the series is a cumulative sum over them.
+
+        Returns (window end times, tags, bytes)
+
+        :param input time: array of transaction times
+        :param input tags: array of tags
+        :param input ts: array of transaction sizes
+        :param input window: width of the window in trace time
+        :param input step: how far the window slides, in trace time
+    """
+    if not len(time):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), \
+            np.empty(0, dtype=np.int64)
+
+    # step every transaction falls in, and the window in steps
+    start = int(time.min())
+    k = (time.astype(np.int64) - start)//step
+    width = max(1, window//step)
+    steps = int(k.max()) + 1
+
+    # one entry per tag and step, ordered by tag then step
+    order = np.lexsort((k, tags))
+    tag, k, size = tags[order], k[order], ts[order].astype(np.int64)
+    keep = np.ones(len(tag), dtype=bool)
+    keep[1:] = (tag[1:] != tag[:-1]) | (k[1:] != k[:-1])
+    tag, k, size = tag[keep], k[keep], size[keep]
+
+    # counted in the windows ending at steps k .. k + width - 1,
+    # or until the next step the tag is used in
+    end = k + width - 1
+    again = tag[1:] == tag[:-1]
+    end[:-1][again] = np.minimum(end[:-1][again], k[1:][again] - 1)
+    end = np.minimum(end, steps - 1)
+
+    # +1 where the interval starts, -1 after it ends
+    n = np.bincount(k, minlength=steps + 1) - \
+        np.bincount(end + 1, minlength=steps + 1)
+    b = np.bincount(k, weights=size, minlength=steps + 1) - \
+        np.bincount(end + 1, weights=size, minlength=steps + 1)
+
+    ends = start + (np.arange(steps, dtype=np.int64) + 1)*step
+    return ends, np.cumsum(n)[:steps], np.cumsum(b)[:steps].astype(np.int64)
+
+
+def per_tag(tags, ts, dist):
+    """
+        Accesses, reuses, mean reuse distance and bytes of every tag
+
+        Returns a list of (tag, accesses, reuses, mean distance, bytes)
+
+        :param input tags: array of tags
+        :param input ts: array of transaction sizes
+        :param input dist: reuse distances from reuse_distances()
+    """
+    if not len(tags):
+        return []
+    unique, index = np.unique(tags, return_inverse=True)
+    accesses = np.bincount(index)
+    reused = dist >= 0
+    reuses = np.bincount(index, weights=reused)
+    total = np.bincount(index, weights=np.where(reused, dist, 0))
+    mean = total/np.maximum(reuses, 1)
+    size = np.bincount(index, weights=ts)
+    return zip(unique.tolist(), accesses.tolist(), reuses.astype(np.int64).tolist(),
+               mean.tolist(), size.astype(np.int64).tolist())
+
+
+def profile(trace, window=None, step=None, tags=False):
+    """
+        Profile a trace
+
+        Returns a dict of sections, see the top of the file
+
+        :param input trace: structured array of transactions
+        :param input window: working set window in trace time,
+                             defaults to 1/100 of the trace
+        :param input step: how far the window slides, defaults to
+                           1/10 of the window
+        :param input tags: also profile every tag
+    """
+    time = trace['time']
+    device = trace['device']
+    op = trace['op']
+    ts = trace['ts'].astype(np.int64)
+    tag = trace['tag']
+    rows = len(trace)
+
+    # how long the trace is in trace time
+    span = int(time.max() - time.min()) if rows else 0
+
+    result = {}
+    result['summary'] = {
+        'transactions': rows,
+        'devices': len(np.unique(device)),
+        'tags': len(np.unique(tag)),
+        'bytes': int(ts.sum()),
+        'sends': int((op == 0).sum()),
+        'requests': int((op == 1).sum()),
+        'time_span': span,
+    }
+
+    # op mix and bytes per device
+    send = op == 0
+    n = np.bincount(device, minlength=1)
+    sends = np.bincount(device[send], minlength=len(n))
+    send_bytes = np.bincount(device[send], weights=ts[send], minlength=len(n))
+    all_bytes = np.bincount(device, weights=ts, minlength=len(n))
+    result['devices'] = dict(
+        (d, {'transactions': int(n[d]), 'sends': int(sends[d]),
+             'requests': int(n[d] - sends[d]),
+             'send_bytes': int(send_bytes[d]),
+             'request_bytes': int(all_bytes[d] - send_bytes[d])})
+        for d in np.flatnonzero(n).tolist())
+
+    # split at the L1/L2 boundary
+    l2 = ts > L1_MAX
+    result['size_classes'] = {}
+    for level, mask in (('L1', ~l2), ('L2', l2)):
+        result['size_classes'][level] = {
+            'transactions': int(mask.sum()),
+            'sends': int((mask & send).sum()),
+            'requests': int((mask & ~send).sum()),
+            'bytes': int(ts[mask].sum()),
+            'tags': len(np.unique(tag[mask])),
+        }
+
+    # transactions of every size
+    sizes, counts = np.unique(ts, return_counts=True)
+    result['sizes'] = dict(zip(sizes.tolist(), counts.tolist()))
+
+    # reuse distance of the L1 and L2 streams
+    result['reuse'] = {}
+    if tags:
+        result['tags'] = {}
+    for level, mask in (('L1', ~l2), ('L2', l2)):
+        dist = reuse_distances(tag[mask])
+        reused = dist[dist >= 0]
+        result['reuse'][level] = {
+            'cold': int((dist < 0).sum()),
+            'reuses': len(reused),
+            'mean': float(reused.mean()) if len(reused) else 0.0,
+            'median': float(np.median(reused)) if len(reused) else 0.0,
+            'histogram': log2_histogram(reused),
+        }
+        if tags:
+            result['tags'][level] = per_tag(tag[mask], ts[mask], dist)
+
+    # working set over time
+    if window is None:
+        window = max(1, -(-span//WINDOWS))
+    if step is None:
+        step = max(1, window//STEPS)
+
+    # the window is a whole number of steps
+    window = max(1, window//step)*step
+    ends, ws_tags, ws_bytes = working_set(time, tag, ts, window, step)
+    result['working_set'] = {
+        'window': window,
+        'step': step,
+        'time': ends.tolist(),
+        'tags': ws_tags.tolist(),
+        'bytes': ws_bytes.tolist(),
+        'max_tags': int(ws_tags.max()) if len(ws_tags) else 0,
+        'max_bytes': int(ws_bytes.max()) if len(ws_bytes) else 0,
+        'mean_tags': float(ws_tags.mean()) if len(ws_tags) else 0.0,
+    }
+
+    # inter-arrival times, overall and per device
+    order = np.lexsort((time, device))
+    t = time[order].astype(np.int64)
+    d = device[order]
+    gap = np.diff(t)
+    same = d[1:] == d[:-1]
+    result['inter_arrival'] = {'all': log2_histogram(np.diff(np.sort(time).astype(np.int64)))}
+    for dev in result['devices']:
+        result['inter_arrival'][dev] = log2_histogram(gap[same & (d[1:] == dev)])
+
+    return result
+
+
+def csv_rows(result):
+    """
+        Flatten a profile into (section, group, key, value) rows
+
+        :param input result: profile from profile()
+    """
+    rows = []
+    for key in sorted(result['summary']):
+        rows.append(('summary', '', key, result['summary'][key]))
+    for dev in sorted(result['devices']):
+        for key in sorted(result['devices'][dev]):
+            rows.append(('devices', dev, key, result['devices'][dev][key]))
+    for level in sorted(result['size_classes']):
+        for key in sorted(result['size_classes'][level]):
+            rows.append(('size_classes', level, key, result['size_classes'][level][key]))
+    for size in sorted(result['sizes']):
+        rows.append(('sizes', '', size, result['sizes'][size]))
+    for level in sorted(result['reuse']):
+        reuse = result['reuse'][level]
+        for key in ('cold', 'reuses', 'mean', 'median'):
+            rows.append(('reuse', level, key, reuse[key]))
+        for lower, count in reuse['histogram']:
+            rows.append(('reuse_histogram', level, lower, count))
+    ws = result['working_set']
+    for key in ('window', 'step', 'max_tags', 'max_bytes', 'mean_tags'):
+        rows.append(('working_set', '', key, ws[key]))
+    for t, n, b in zip(ws['time'], ws['tags'], ws['bytes']):
+        rows.append(('working_set_tags', '', t, n))
+        rows.append(('working_set_bytes', '', t, b))
+    for group in sorted(result['inter_arrival']):
+        for lower, count in result['inter_arrival'][group]:
+            rows.append(('inter_arrival', group, lower, count))
+    for level in sorted(result.get('tags', {})):
+        for tag, accesses, reuses, mean, size in result['tags'][level]:
+            rows.append(('tag_accesses', level, tag, accesses))
+            rows.append(('tag_reuses', level, tag, reuses))
+            rows.append(('tag_mean_reuse', level, tag, mean))
+            rows.append(('tag_bytes', level, tag, size))
+    return rows
+
+
+def show(result):
+    """ Nice print out of a profile """
+    summary = result['summary']
+    print '--------------------------------------'
+    print '%s transactions, %s devices, %s tags, %s bytes over %s time' % (
+        summary['transactions'], summary['devices'], summary['tags'],
+        summary['bytes'], summary['time_span'])
+    print 'Device  Transactions  SENDs  REQUESTs  Bytes sent  Bytes requested'
+    for dev in sorted(result['devices']):
+        r = result['devices'][dev]
+        print '%6s  %12s  %5s  %8s  %10s  %15s' % (
+            dev, r['transactions'], r['sends'], r['requests'],
+            r['send_bytes'], r['request_bytes'])
+    print 'Level  Transactions  SENDs  REQUESTs  Bytes  Tags  Cold  Reuse mean/median'
+    for level in ('L1', 'L2'):
+        r = result['size_classes'][level]
+        reuse = result['reuse'][level]
+        print '%5s  %12s  %5s  %8s  %5s  %4s  %4s  %.1f / %.1f' % (
+            level, r['transactions'], r['sends'], r['requests'], r['bytes'],
+            r['tags'], reuse['cold'], reuse['mean'], reuse['median'])
+    ws = result['working_set']
+    print 'Working set (window %s, step %s): max %s tags / %s bytes, mean %.1f tags' % (
+        ws['window'], ws['step'], ws['max_tags'], ws['max_bytes'], ws['mean_tags'])
+    print 'Inter-arrival time  Transactions'
+    for lower, count in result['inter_arrival']['all']:
+        print '%18s  %12s' % ('%s+' % lower, count)
+    print '--------------------------------------'
+
+
+if __name__ == '__main__':
+
+    # initialize argument parser
+    parser = argparse.ArgumentParser()
+
+    # argument for filename of traffic file
+    parser.add_argument('-f',
+                        action='store',
+                        dest='fname',
+                        required=True,
+                        help='filename of a traffic file or binary trace file'
+                        )
+
+    # arguments for the working set window
+    parser.add_argument('-w', '--window',
+                        action='store',
+                        dest='window',
+                        type=int,
+                        help='working set window in trace time, '
+                             'defaults to 1/%d of the trace' % WINDOWS
+                        )
+    parser.add_argument('--step',
+                        action='store',
+                        dest='step',
+                        type=int,
+                        help='how far the window slides, '
+                             'defaults to 1/%d of the window' % STEPS
+                        )
+
+    # argument for a row per tag
+    parser.add_argument('--tags',
+                        action='store_true',
+                        dest='tags',
+                        help='also profile every tag'
+                        )
+
+    # arguments for saving the profile
+    parser.add_argument('-o',
+                        action='store',
+                        dest='output',
+                        help='write the profile to this file'
+                        )
+    parser.add_argument('--format',
+                        action='store',
+                        dest='format',
+                        choices=['csv', 'json'],
+                        help='format of the file, by default json if '
+                             'it ends in .json, else csv'
+                        )
+
+    # parse the arguments
+    arguments = parser.parse_args()
+
+    # make sure the file is there
+    if not isfile(arguments.fname):
+        print 'ERROR: %s does NOT exist' % arguments.fname
+        exit(1)
+    trace = load(arguments.fname)
+
+    # all of it in one go
+    result = profile(trace, arguments.window, arguments.step, arguments.tags)
+    show(result)
+
+    # optionally save it
+    if arguments.output:
+        fmt = arguments.format
+        if fmt is None:
+            fmt = 'json' if arguments.output.endswith('.json') else 'csv'
+        with open(arguments.output, 'w') as f:
+            if fmt == 'json':
+                json.dump(result, f, indent=1, sort_keys=True,
+                          separators=(',', ': '))
+            else:
+                f.write('section,group,key,value\n')
+                for row in csv_rows(result):
+                    f.write('%s,%s,%s,%s\n' % row)
@@ -180,5 +180,7 @@ def simulate(timesteps):
     sim = Simulation(tb)
     sim.run(timesteps)
 
-# call simulate function to simulate!
-simulate(2000)
+if __name__ == '__main__':
+
+    # call simulate function to simulate!
+    simulate(2000)
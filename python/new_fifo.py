@@ -18,19 +18,6 @@ parser.add_argument('-f',
                     help='filename'
                     )
 
-# parse the arguments
-arguments = parser.parse_args()
-
-# use numpy to load data from csv file
-columns = np.loadtxt(arguments.fname, dtype=int, delimiter=',', unpack=True)
-
-# put data from csv file into arrays
-t = columns[0]       # time
-device = columns[1]  # device ID
-op = columns[2]      # operation type
-ts = columns[3]      # transaction size
-tag = columns[4]     # tag
-
 
 # size in bytes
 M1 = 256
@@ -226,11 +213,10 @@ class cache:
         self.m.pop(tag)
 
 
-L1 = cache(max_capacity=M1)
-L2 = cache(max_capacity=10*M3, latency=M3_latency)
+def operations(mem1, mem2, trace):
 
-
-def operations(mem1, mem2):
+    # put data from csv file into arrays
+    t, device, op, ts, tag = trace
 
     for i in range(len(t)):
 
@@ -269,14 +255,25 @@ def operations(mem1, mem2):
 
 def main():
     """ Main function """
+
+    # parse the arguments
+    arguments = parser.parse_args()
+
+    # use numpy to load data from csv file
+    columns = np.loadtxt(arguments.fname, dtype=int, delimiter=',', unpack=True)
+
+    L1 = cache(max_capacity=M1)
+    L2 = cache(max_capacity=10*M3, latency=M3_latency)
+
     # instance of users, give them an instance of the wireless hub
-    ops = operations(L1, L2)
+    ops = operations(L1, L2, columns)
+
+    # using MyHDL simulation environment, give it the operations
+    sim = Simulation(ops)
 
-    # return local generator for simulation
-    return ops
+    # run simulation
+    sim.run()
 
-# using MyHDL simulation environment, give it main
-sim = Simulation(main())
 
-# run simulation
-sim.run()
+if __name__ == '__main__':
+    main()